@@ -0,0 +1,240 @@
+import asyncio
+import os
+import zlib
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_STREAM_MIN_SIZE = int(
+    os.getenv("COMPRESSION_STREAM_MIN_SIZE", str(4 * 1024 * 1024))
+)
+COMPRESSION_CHUNK_SIZE = int(os.getenv("COMPRESSION_CHUNK_SIZE", str(1024 * 1024)))
+COMPRESSION_ENCODINGS = tuple(
+    name.strip()
+    for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if name.strip()
+)
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+# Chunks at least this large are compressed off the event loop
+THREAD_MIN_SIZE = 128 * 1024
+EXCLUDED_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/zstd",
+    "text/event-stream",
+)
+
+
+class _Compressor:
+    """Incremental compressor with a common interface for every codec.
+
+    compress() may buffer; flush() emits everything compressed so far so a
+    streamed chunk can be decoded on arrival; finish() ends the stream.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.encoding = encoding
+
+    def compress(self, data) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.compress(data)
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.flush()
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def negotiate_encoding(accept_encoding: str, available=COMPRESSION_ENCODINGS):
+    """The accepted encoding with the highest q-value, ties going to the
+    server's order of preference; None when nothing acceptable is enabled"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.lower()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(name, wildcard), -rank, name)
+        for rank, name in enumerate(available)
+    ]
+    q, _, name = max(candidates, default=(0.0, 0, None))
+    return name if q > 0 else None
+
+
+class CompressionMiddleware:
+    """Compresses responses with zstd, brotli or gzip per Accept-Encoding.
+
+    Bodies under minimum_size are sent as they are. A single body under
+    stream_minimum_size is compressed in one go with a Content-Length.
+    Larger bodies, and responses the app already streams, are compressed
+    chunk_size bytes at a time and each compressed piece is sent as soon as
+    it is ready, so no second full-size copy is held. route_levels maps a
+    path prefix to per-encoding levels; the longest matching prefix wins.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        stream_minimum_size: int = COMPRESSION_STREAM_MIN_SIZE,
+        chunk_size: int = COMPRESSION_CHUNK_SIZE,
+        route_levels: dict[str, dict[str, int]] | None = None,
+        encodings: tuple[str, ...] = COMPRESSION_ENCODINGS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stream_minimum_size = stream_minimum_size
+        self.chunk_size = chunk_size
+        self.route_levels = sorted(
+            (route_levels or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.encodings = encodings
+
+    def level(self, path: str, encoding: str) -> int:
+        for prefix, levels in self.route_levels:
+            if path.startswith(prefix) and encoding in levels:
+                return levels[encoding]
+        return DEFAULT_LEVELS[encoding]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(
+            self, encoding, self.level(scope["path"], encoding), send
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str, level: int, send: Send
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.level = level
+        self._send = send
+        self.start: Message | None = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    def _eligible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "").lower()
+        return (
+            message["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+        )
+
+    async def _compress(self, data, finish: bool, flush: bool) -> bytes:
+        def run():
+            out = self.compressor.compress(data)
+            if finish:
+                return out + self.compressor.finish()
+            return out + self.compressor.flush() if flush else out
+
+        if len(data) >= THREAD_MIN_SIZE:
+            return await asyncio.to_thread(run)
+        return run()
+
+    async def _send_start(self, compressed: bool, length: int | None = None):
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            if length is None:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(length)
+        await self._send(self.start)
+
+    async def send(self, message: Message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            self.passthrough = not self._eligible(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+        if self.passthrough or kind != "http.response.body":
+            if not self.passthrough and self.compressor is None:
+                # e.g. pathsend before any body: the response goes out untouched
+                self.passthrough = True
+                await self._send(self.start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self._send_start(compressed=False)
+                await self._send(message)
+                return
+            self.compressor = _Compressor(self.encoding, self.level)
+            if not more_body and len(body) < self.middleware.stream_minimum_size:
+                body = await self._compress(body, finish=True, flush=False)
+                await self._send_start(compressed=True, length=len(body))
+                await self._send({"type": kind, "body": body, "more_body": False})
+                return
+            await self._send_start(compressed=True)
+
+        await self._send_chunks(body, more_body)
+
+    async def _send_chunks(self, body: bytes, more_body: bool):
+        """Compress a body slice by slice, sending each piece once it exists"""
+        view = memoryview(body)
+        step = self.middleware.chunk_size
+        for offset in range(0, len(view), step):
+            piece = await self._compress(
+                view[offset : offset + step], finish=False, flush=False
+            )
+            if piece:
+                await self._send(
+                    {"type": "http.response.body", "body": piece, "more_body": True}
+                )
+        # A chunk the app streamed is flushed so the client can decode it now
+        tail = await self._compress(b"", finish=not more_body, flush=more_body)
+        await self._send(
+            {"type": "http.response.body", "body": tail, "more_body": more_body}
+        )
@@ -1,9 +1,15 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, status, Request
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from .compression import CompressionMiddleware
 from .routes import data_science, csv_file, machine_learning, data_summary
+from ..datascience.compute_pool import compute_pool
+from ..datascience.dataframe_cache import dataframe_cache
+from ..service.responses import NumpyJSONResponse
 # from ..service.database.database_service import DatabaseService, engine
 
 # db_service = DatabaseService()
@@ -16,7 +22,15 @@ from .routes import data_science, csv_file, machine_learning, data_summary
 #     await engine.dispose()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    compute_pool.shutdown()
+    # Unlinks the shared-memory copies handed to worker processes
+    dataframe_cache.clear()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=NumpyJSONResponse)
 limiter = Limiter(key_func=get_remote_address)
 
 app.state.limiter = limiter
@@ -25,6 +39,16 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # CORS middleware removed (backend only accessed internally by Streamlit)
 
+app.add_middleware(
+    CompressionMiddleware,
+    route_levels={
+        # Multi-MB numeric plot payloads: favour speed over ratio
+        "/data_science": {"zstd": 1, "br": 2, "gzip": 4},
+        # Trained models are downloaded rarely and compress well
+        "/machine_learning/download": {"zstd": 9, "br": 6, "gzip": 9},
+    },
+)
+
 app.include_router(data_science.router, prefix="/data_science", tags=["Data Science"])
 app.include_router(csv_file.router, prefix="/csv_file", tags=["CSV File"])
 app.include_router(
@@ -43,4 +67,4 @@ async def read_root(request: Request):
 @app.get("/health", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def health_check(request: Request):
-    return {"status": "healthy"}
+    return {"status": "healthy", "compute_pool": compute_pool.stats()}
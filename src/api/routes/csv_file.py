@@ -2,6 +2,7 @@ from fastapi import APIRouter, Query, File, UploadFile, status, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from ...service.datascience.profile_service import ProfileService
 from ...service.fileservice.csv_service import CsvService
 
 router = APIRouter()
@@ -21,7 +22,9 @@ async def extract_csv_features(
 @router.post("/upload_csv", status_code=status.HTTP_200_OK)
 @limiter.limit("10/minute")
 async def upload_csv(request: Request, file: UploadFile = File(...)):
-    return await csv_service.upload_csv_file_service(file)
+    result = await csv_service.upload_csv_file_service(file)
+    ProfileService.start_profile(result["absolute_file_path"])
+    return result
 
 
 @router.delete("/cleanup_temp_file", status_code=status.HTTP_200_OK)
@@ -29,8 +32,11 @@ async def upload_csv(request: Request, file: UploadFile = File(...)):
 async def cleanup_temp_file(
     request: Request,
     file_path: str = Query(..., description="Path to the temporary file to delete"),
+    reference: str | None = Query(
+        None, description="Upload reference to release, as returned by upload_csv"
+    ),
 ):
-    success = csv_service.cleanup_temp_file(file_path)
+    success = csv_service.cleanup_temp_file(file_path, reference)
     if success:
         return {"message": "Temporary file cleaned up successfully"}
     else:
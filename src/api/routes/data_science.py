@@ -1,10 +1,22 @@
+from typing import Literal
+
 from fastapi import APIRouter, Query, HTTPException, status, Request, Depends
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from ...datascience.plots.aggregations import (
+    BOX_PLOT_MAX_OUTLIERS,
+    HISTOGRAM_MAX_RAW_ROWS,
+    LINE_PLOT_MAX_POINTS,
+    PAIR_PLOT_MAX_COLUMNS,
+    PAIR_PLOT_MAX_ROWS,
+    SCATTER_GRIDSIZE,
+    SCATTER_SAMPLE_SIZE,
+)
 from ...service.datascience.plot_service import PlotService
+from ...service.responses import conditional_get, respond
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(conditional_get)])
 limiter = Limiter(key_func=get_remote_address)
 
 
@@ -24,6 +36,24 @@ def common_feature2(
     return feature2
 
 
+def common_max_points(
+    max_points: int = Query(
+        LINE_PLOT_MAX_POINTS,
+        ge=0,
+        description="Downsample each series to at most this many points (0 = all)",
+    ),
+):
+    return max_points
+
+
+def common_exact(
+    exact: bool = Query(
+        False, description="Compute exact results instead of sketches on large data"
+    ),
+):
+    return exact
+
+
 async def get_service(file_path: str):
     try:
         return PlotService(file_path)
@@ -42,32 +72,83 @@ async def scatter_plot(
     csv_file: str = Depends(common_csv_file),
     feature1: str = Depends(common_feature1),
     feature2: str = Depends(common_feature2),
+    mode: Literal["auto", "points", "density", "sample"] = Query(
+        "auto",
+        description="auto bins large files and returns raw points for small ones",
+    ),
+    grid: Literal["rect", "hex"] = Query("rect", description="Density grid shape"),
+    gridsize: int = Query(
+        SCATTER_GRIDSIZE, ge=5, le=500, description="Density cells along the x axis"
+    ),
+    sample_size: int = Query(
+        SCATTER_SAMPLE_SIZE, ge=1, le=100_000, description="Rows in sample mode"
+    ),
+    seed: int = Query(0, description="Random seed of sample mode"),
 ):
     service = await get_service(csv_file)
-    return await service.get_scatter_plot_data_service(feature1, feature2)
+    return respond(
+        request,
+        await service.get_scatter_plot_data_service(
+            feature1, feature2, mode, grid, gridsize, sample_size, seed
+        ),
+    )
 
 
 @router.get("/histogram_plot", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def histogram_plot(request: Request, csv_file: str = Depends(common_csv_file)):
+async def histogram_plot(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    columns: list[str] | None = Query(
+        None, description="Numeric columns to bin (default: all numeric columns)"
+    ),
+    bins: str = Query(
+        "auto", description="Bin count, or a numpy rule: auto, fd, sturges, ..."
+    ),
+    raw_limit: int = Query(
+        0,
+        ge=0,
+        le=HISTOGRAM_MAX_RAW_ROWS,
+        description="Also return the first N raw values of each column",
+    ),
+):
     service = await get_service(csv_file)
-    return await service.get_histogram_plot_data_service()
+    return respond(
+        request, await service.get_histogram_plot_data_service(columns, bins, raw_limit)
+    )
 
 
 @router.get("/line_plot", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def line_plot(request: Request, csv_file: str = Depends(common_csv_file)):
+async def line_plot(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    max_points: int = Depends(common_max_points),
+):
     service = await get_service(csv_file)
-    return await service.get_line_plot_data_service()
+    return respond(request, await service.get_line_plot_data_service(max_points))
 
 
 @router.get("/correlation_matrix", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def correlation_matrix(
-    request: Request, csv_file: str = Depends(common_csv_file)
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    method: Literal["pearson", "spearman"] = Query(
+        "pearson", description="Correlation coefficient"
+    ),
+    top_k: int | None = Query(
+        None, ge=1, description="Return only the k most strongly correlated pairs"
+    ),
+    float32: bool = Query(
+        False, description="Compute in single precision (faster, ~1e-7 error)"
+    ),
 ):
     service = await get_service(csv_file)
-    return await service.get_correlation_matrix_data_service()
+    return respond(
+        request,
+        await service.get_correlation_matrix_data_service(method, top_k, float32),
+    )
 
 
 @router.get("/box_plot", status_code=status.HTTP_200_OK)
@@ -76,16 +157,51 @@ async def box_plot(
     request: Request,
     csv_file: str = Depends(common_csv_file),
     feature1: str = Depends(common_feature1),
+    exact: bool = Depends(common_exact),
+    group_by: str | None = Query(
+        None, description="Categorical column to draw one box per value of"
+    ),
+    max_outliers: int = Query(
+        BOX_PLOT_MAX_OUTLIERS,
+        ge=0,
+        le=100_000,
+        description="Sample the outliers of each box down to this many",
+    ),
+    seed: int = Query(0, description="Random seed of the outlier sample"),
 ):
     service = await get_service(csv_file)
-    return await service.get_box_plot_data_service(feature1)
+    return respond(
+        request,
+        await service.get_box_plot_data_service(
+            feature1, exact, group_by, max_outliers, seed
+        ),
+    )
 
 
 @router.get("/pair_plot", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def pair_plot(request: Request, csv_file: str = Depends(common_csv_file)):
+async def pair_plot(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    max_rows: int = Query(
+        PAIR_PLOT_MAX_ROWS, ge=1, le=50_000, description="Rows in the shared sample"
+    ),
+    max_columns: int = Query(
+        PAIR_PLOT_MAX_COLUMNS,
+        ge=2,
+        le=30,
+        description="Plot only the first N numeric columns",
+    ),
+    label: str | None = Query(
+        None, description="Stratify the sample by this column and return it"
+    ),
+    seed: int = Query(0, description="Random seed of the sample"),
+):
     service = await get_service(csv_file)
-    return await service.get_pair_plot_data_service()
+    return respond(
+        request,
+        await service.get_pair_plot_data_service(max_rows, max_columns, label, seed),
+    )
 
 
 @router.get("/area_plot", status_code=status.HTTP_200_OK)
@@ -94,6 +210,9 @@ async def area_plot(
     request: Request,
     csv_file: str = Depends(common_csv_file),
     feature1: str = Depends(common_feature1),
+    max_points: int = Depends(common_max_points),
 ):
     service = await get_service(csv_file)
-    return await service.get_area_plot_data_service(feature1)
+    return respond(
+        request, await service.get_area_plot_data_service(feature1, max_points)
+    )
@@ -3,8 +3,9 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from ...service.datascience.data_summary_service import DataSummaryService
+from ...service.responses import conditional_get, respond, server_timing
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(conditional_get)])
 limiter = Limiter(key_func=get_remote_address)
 
 
@@ -12,6 +13,22 @@ def common_csv_file(csv_file: str = Query(..., description="Path to the CSV file
     return csv_file
 
 
+def common_exact(
+    exact: bool = Query(
+        False, description="Compute exact results instead of sketches on large data"
+    ),
+):
+    return exact
+
+
+def common_reference(
+    reference: str | None = Query(
+        None, description="Upload reference whose original filename to report"
+    ),
+):
+    return reference
+
+
 async def get_service(file_path: str):
     try:
         return DataSummaryService(file_path)
@@ -25,57 +42,78 @@ async def get_service(file_path: str):
 
 @router.get("/file_info", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def file_info(request: Request, csv_file: str = Depends(common_csv_file)):
+async def file_info(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    reference: str | None = Depends(common_reference),
+):
     service = await get_service(csv_file)
-    return await service.get_file_info_service()
+    return respond(request, await service.get_file_info_service(reference))
 
 
 @router.get("/data_description", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def data_description(request: Request, csv_file: str = Depends(common_csv_file)):
+async def data_description(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    exact: bool = Depends(common_exact),
+):
     service = await get_service(csv_file)
-    return await service.get_data_description_service()
+    return respond(request, await service.get_data_description_service(exact))
 
 
 @router.get("/data_info", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def data_info(request: Request, csv_file: str = Depends(common_csv_file)):
     service = await get_service(csv_file)
-    return await service.get_data_info_service()
+    return respond(request, await service.get_data_info_service())
 
 
 @router.get("/data_types", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def data_types(request: Request, csv_file: str = Depends(common_csv_file)):
     service = await get_service(csv_file)
-    return await service.get_data_types_service()
+    return respond(request, await service.get_data_types_service())
 
 
 @router.get("/categorical_columns_count", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def categorical_columns_count(
-    request: Request, csv_file: str = Depends(common_csv_file)
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    exact: bool = Depends(common_exact),
 ):
     service = await get_service(csv_file)
-    return await service.get_categorical_columns_count_service()
+    return respond(request, await service.get_categorical_columns_count_service(exact))
 
 
 @router.get("/row_col_count", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def row_col_count(request: Request, csv_file: str = Depends(common_csv_file)):
     service = await get_service(csv_file)
-    return await service.get_row_col_count_service()
+    return respond(request, await service.get_row_col_count_service())
 
 
 @router.get("/null_value_count", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
 async def null_values(request: Request, csv_file: str = Depends(common_csv_file)):
     service = await get_service(csv_file)
-    return await service.get_null_val_count_service()
+    return respond(request, await service.get_null_val_count_service())
 
 
 @router.get("/all_stats", status_code=status.HTTP_200_OK)
 @limiter.limit("20/minute")
-async def all_stats(request: Request, csv_file: str = Depends(common_csv_file)):
+async def all_stats(
+    request: Request,
+    csv_file: str = Depends(common_csv_file),
+    exact: bool = Depends(common_exact),
+    reference: str | None = Depends(common_reference),
+):
     service = await get_service(csv_file)
-    return await service.get_all_stats_service()
+    result = await service.get_all_stats_service(exact, reference)
+    # Timings change on every run, so they stay out of the ETagged body
+    timings = result.pop("timings_ms", None)
+    response = respond(request, result)
+    if timings:
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
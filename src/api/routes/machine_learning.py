@@ -2,9 +2,9 @@ from pathlib import Path
 
 from fastapi import APIRouter, Query, Depends, Form
 from fastapi.responses import JSONResponse, FileResponse
-import pandas as pd
 import json
 
+from ...datascience.ingest import dataset_columns
 from ...machinelearning.main_train_flow import train_pipeline, predict_pipeline
 
 # Import the template content
@@ -36,8 +36,7 @@ async def train_endpoint(
     try:
         csv_path = Path(csv_file)
 
-        data = pd.read_csv(csv_path)
-        if target_var not in data.columns:
+        if target_var not in dataset_columns(str(csv_path)):
             return JSONResponse(
                 status_code=400,
                 content={
@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+
+from .sketches import HyperLogLog, MisraGries
+
+CATEGORICAL_TOP_K = int(os.getenv("CATEGORICAL_TOP_K", "20"))
+CATEGORICAL_SKETCH_CAPACITY = int(os.getenv("CATEGORICAL_SKETCH_CAPACITY", "1000"))
+CATEGORICAL_EXACT_LIMIT = int(os.getenv("CATEGORICAL_EXACT_LIMIT", "10000"))
+PROFILE_CHUNK_ROWS = 100_000
+
+
+class CategoricalProfiler:
+    """Distinct count and most frequent values of one column in bounded memory"""
+
+    def __init__(self, capacity: int = CATEGORICAL_SKETCH_CAPACITY):
+        self.distinct = HyperLogLog()
+        self.heavy_hitters = MisraGries(capacity)
+
+    def update(self, series: pd.Series) -> "CategoricalProfiler":
+        self.distinct.update(series)
+        self.heavy_hitters.update(series)
+        return self
+
+    def profile(self, top_k: int = CATEGORICAL_TOP_K) -> dict:
+        if self.heavy_hitters.exact:
+            # Never evicted a counter, so every value and count is known exactly
+            return {
+                "distinct_count": len(self.heavy_hitters.counts),
+                "top_values": self.heavy_hitters.top(),
+                "approximate": False,
+            }
+        return {
+            "distinct_count": self.distinct.estimate(),
+            "top_values": self.heavy_hitters.top(top_k),
+            "approximate": True,
+            "count_error_bound": self.heavy_hitters.error_bound,
+        }
+
+
+def _exact_profile(series: pd.Series) -> dict:
+    counts = series.value_counts()
+    counts = counts[counts > 0]
+    return {
+        "distinct_count": len(counts),
+        "top_values": {key: int(value) for key, value in counts.items()},
+        "approximate": False,
+    }
+
+
+def profile_categorical_column(
+    series: pd.Series, exact: bool = False, chunk_rows: int = PROFILE_CHUNK_ROWS
+) -> dict:
+    """Sketch one column chunk by chunk.
+
+    With exact=True, columns whose estimated distinct count is within
+    CATEGORICAL_EXACT_LIMIT get full value counts. Larger ones stay sketched
+    and say why, since their top_values only hold the heavy hitters (none at
+    all when every value is unique).
+    """
+    profiler = CategoricalProfiler()
+    for start in range(0, len(series), chunk_rows):
+        profiler.update(series.iloc[start : start + chunk_rows])
+    profile = profiler.profile()
+
+    if exact and profile["approximate"]:
+        if profile["distinct_count"] <= CATEGORICAL_EXACT_LIMIT:
+            return _exact_profile(series)
+        profile["reason"] = (
+            f"about {profile['distinct_count']} distinct values exceed "
+            f"CATEGORICAL_EXACT_LIMIT={CATEGORICAL_EXACT_LIMIT}; only values "
+            f"occurring more than {profile['count_error_bound']} times are "
+            "guaranteed to be listed"
+        )
+    return profile
+
+
+def profile_categorical_columns(
+    df: pd.DataFrame, exact: bool = False, chunk_rows: int = PROFILE_CHUNK_ROWS
+) -> dict:
+    """Profile every object/category column without a union-indexed frame"""
+    return {
+        column: profile_categorical_column(df[column], exact, chunk_rows)
+        for column in df.select_dtypes(include=["object", "category"]).columns
+    }
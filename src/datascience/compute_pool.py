@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .dataframe_cache import dataframe_cache
+from .shared_frames import SharedFrame, SharedFrameHandle, attach_frame
+
+COMPUTE_BACKEND = os.getenv("COMPUTE_BACKEND", "thread")
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(os.cpu_count() or 1)))
+COMPUTE_MAX_QUEUE = int(os.getenv("COMPUTE_MAX_QUEUE", "64"))
+SHARED_FRAME_MIN_MB = float(os.getenv("SHARED_FRAME_MIN_MB", "1"))
+
+
+class ComputePoolBusy(RuntimeError):
+    """Raised when a task arrives while the pool's queue is already full"""
+
+
+def _timed_call(func, *args):
+    # Runs in the worker so the measured time excludes queueing and transfer
+    args = [
+        attach_frame(arg) if isinstance(arg, SharedFrameHandle) else arg for arg in args
+    ]
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class ComputePool:
+    """Application-wide executor for CPU-bound dataset work.
+
+    Light tasks always run on a thread pool. Tasks submitted with heavy=True
+    run on a process pool when the backend is "process", so large pandas
+    reductions are not serialised by the GIL. DataFrame arguments of
+    process tasks travel as shared-memory handles instead of pickles, unless
+    they are small and uncached. At most
+    workers + max_queue requests are admitted at once, a map() counting as
+    one; beyond that ComputePoolBusy is raised.
+    """
+
+    def __init__(
+        self,
+        backend: str = COMPUTE_BACKEND,
+        workers: int = COMPUTE_WORKERS,
+        max_queue: int = COMPUTE_MAX_QUEUE,
+    ):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown compute backend: {backend}")
+        self.backend = backend
+        self.workers = workers
+        self.max_queue = max_queue
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._timings = defaultdict(
+            lambda: {"calls": 0, "run_ms": 0.0, "wait_ms": 0.0, "max_run_ms": 0.0}
+        )
+
+    def _executor(self, heavy: bool) -> Executor:
+        if heavy and self.backend == "process":
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.workers)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="compute"
+            )
+        return self._threads
+
+    def _record(self, name: str, run_seconds: float, total_seconds: float):
+        timing = self._timings[name]
+        timing["calls"] += 1
+        timing["run_ms"] += run_seconds * 1000
+        timing["wait_ms"] += max(total_seconds - run_seconds, 0.0) * 1000
+        timing["max_run_ms"] = max(timing["max_run_ms"], run_seconds * 1000)
+
+    @staticmethod
+    def _share_frames(arg_tuples: list) -> tuple[list, list[SharedFrame]]:
+        """Swap DataFrame arguments for handles to shared-memory copies.
+
+        Each distinct frame is shared once, however many calls it is passed to.
+        Frames that are not cached, such as column projections, are copied
+        for the request; below SHARED_FRAME_MIN_MB they are pickled instead,
+        which costs less than creating their blocks.
+        """
+        handles, frames = {}, []
+        min_bytes = SHARED_FRAME_MIN_MB * 1024 * 1024
+
+        def swap(arg):
+            if not isinstance(arg, pd.DataFrame):
+                return arg
+            if id(arg) not in handles:
+                frame = dataframe_cache.acquire_shared(arg)
+                if frame is None and arg.memory_usage().sum() < min_bytes:
+                    handles[id(arg)] = arg
+                    return arg
+                if frame is None:
+                    # Not a cached frame: share it for this request only
+                    frame = SharedFrame(arg)
+                    frame.acquire()
+                    frame.discard()
+                frames.append(frame)
+                handles[id(arg)] = frame.handle
+            return handles[id(arg)]
+
+        return [tuple(swap(arg) for arg in args) for args in arg_tuples], frames
+
+    def _admit(self):
+        if self._pending >= self.workers + self.max_queue:
+            raise ComputePoolBusy("Compute pool is at capacity, retry later")
+        self._pending += 1
+
+    async def _submit(self, func, args, executor: Executor):
+        start = time.perf_counter()
+        result, run_seconds = await asyncio.get_running_loop().run_in_executor(
+            executor, _timed_call, func, *args
+        )
+        self._record(
+            getattr(func, "__qualname__", repr(func)),
+            run_seconds,
+            time.perf_counter() - start,
+        )
+        return result
+
+    async def run(self, func, *args, heavy: bool = False):
+        """Run func(*args) on the pool; heavy tasks may go to a worker process.
+
+        Heavy tasks must be picklable: module-level functions or static
+        methods, with picklable arguments.
+        """
+        return (await self.map(func, [args], heavy=heavy))[0]
+
+    async def map(self, func, arg_tuples, heavy: bool = False) -> list:
+        """Run func once per argument tuple, admitted as a single task.
+
+        The calls queue on the executor rather than each taking an admission
+        slot, so splitting a request into per-column or per-chunk calls does
+        not make the pool look busy. Frames passed to several calls are
+        shared once for all of them. If one call fails, those not yet
+        finished are cancelled.
+        """
+        self._admit()
+        frames = []
+        try:
+            executor = self._executor(heavy)
+            arg_tuples = list(arg_tuples)
+            if executor is self._processes:
+                arg_tuples, frames = await asyncio.get_running_loop().run_in_executor(
+                    self._executor(False), self._share_frames, arg_tuples
+                )
+            tasks = [
+                asyncio.ensure_future(self._submit(func, args, executor))
+                for args in arg_tuples
+            ]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            self._pending -= 1
+            for frame in frames:
+                frame.release()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "tasks": {
+                name: {key: round(value, 3) for key, value in timing.items()}
+                for name, timing in self._timings.items()
+            },
+        }
+
+    def shutdown(self):
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+
+
+compute_pool = ComputePool()
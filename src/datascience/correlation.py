@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CORRELATION_BLOCK_SIZE = int(os.getenv("CORRELATION_BLOCK_SIZE", "256"))
+CORRELATION_METHODS = ("pearson", "spearman")
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    # Centring and scaling each column once keeps the pairwise sums well
+    # conditioned; correlation is unchanged by a per-column affine transform
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(values, axis=0)
+        scale = np.nanstd(values, axis=0)
+    scale[~(scale > 0)] = 1.0
+    return (values - np.nan_to_num(mean)) / scale
+
+
+def _pairwise_block(
+    x: np.ndarray, mx: np.ndarray, y: np.ndarray, my: np.ndarray
+) -> np.ndarray:
+    """Pearson correlation over pairwise-complete rows of two column blocks.
+
+    x and y hold standardized values with missing entries zeroed; mx and my
+    mark the present entries.
+    """
+    n = mx.T @ my
+    sx, sy = x.T @ my, mx.T @ y
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = x.T @ y - sx * sy / n
+        var_x = (x * x).T @ my - sx * sx / n
+        var_y = mx.T @ (y * y) - sy * sy / n
+        return cov / np.sqrt(var_x * var_y)
+
+
+def _ranks_within(order: np.ndarray, values: np.ndarray, rows: np.ndarray):
+    """Average ranks of values over the selected rows.
+
+    order is the argsort of the whole column, so the selected rows come out
+    already sorted and ranking them is linear.
+    """
+    idx = order[rows[order]]
+    sorted_values = values[idx]
+    first = np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    starts = np.flatnonzero(first)
+    ends = np.r_[starts[1:], idx.size]
+    ranks = np.empty(values.size)
+    ranks[idx] = ((starts + ends + 1) / 2)[np.cumsum(first) - 1]
+    return ranks[rows]
+
+
+def _rerank_incomplete_pairs(values: np.ndarray, present: np.ndarray, result):
+    """Spearman for pairs involving a column with missing values, ranked
+    within the rows both columns share as DataFrame.corr() does"""
+    order = np.argsort(values, axis=0, kind="stable")
+    p = values.shape[1]
+    incomplete = ~present.all(axis=0)
+    for i in np.flatnonzero(incomplete):
+        # Complete columns, and incomplete ones not yet paired with i
+        for j in np.flatnonzero(~incomplete | (np.arange(p) > i)):
+            rows = present[:, i] & present[:, j]
+            if rows.sum() < 2:
+                result[i, j] = result[j, i] = np.nan
+                continue
+            x = _ranks_within(order[:, i], values[:, i], rows)
+            y = _ranks_within(order[:, j], values[:, j], rows)
+            x -= x.mean()
+            y -= y.mean()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[i, j] = result[j, i] = (x @ y) / np.sqrt((x @ x) * (y @ y))
+
+
+def correlation_matrix(
+    df: pd.DataFrame,
+    method: str = "pearson",
+    float32: bool = False,
+    block_size: int = CORRELATION_BLOCK_SIZE,
+) -> pd.DataFrame:
+    """Correlation of the numeric columns, computed block by block.
+
+    Columns are standardized once, then each block_size x block_size tile of
+    the matrix is a handful of matrix products over the rows, so the working
+    set stays in cache and only the upper triangle is computed. Missing
+    values are excluded pairwise like DataFrame.corr(). Spearman ranks each
+    column once; pairs with missing values are then re-ranked over the rows
+    both columns share.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+
+    numeric = df.select_dtypes(include=["number"])
+    if method == "spearman":
+        numeric = numeric.rank()
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    columns = numeric.columns
+    p = len(columns)
+
+    present = ~np.isnan(values)
+    dtype = np.float32 if float32 else np.float64
+    z = np.nan_to_num(_standardize(values)).astype(dtype, copy=False)
+    complete = bool(present.all())
+    mask = present.astype(dtype)
+
+    result = np.empty((p, p))
+    for i in range(0, p, block_size):
+        rows = slice(i, i + block_size)
+        for j in range(i, p, block_size):
+            cols = slice(j, j + block_size)
+            if complete:
+                # Population-scaled z-scores: the dot product over n is r
+                block = (z[:, rows].T @ z[:, cols]) / len(z)
+            else:
+                block = _pairwise_block(
+                    z[:, rows], mask[:, rows], z[:, cols], mask[:, cols]
+                )
+            result[rows, cols] = block
+            result[cols, rows] = block.T
+
+    if method == "spearman" and not complete:
+        _rerank_incomplete_pairs(values, present, result)
+
+    np.clip(result, -1.0, 1.0, out=result)
+    # Constant or all-missing columns have no defined correlation
+    with np.errstate(invalid="ignore"):
+        varying = np.nanstd(values, axis=0) > 0
+    result[~varying, :] = np.nan
+    result[:, ~varying] = np.nan
+    np.fill_diagonal(result, np.where(varying, 1.0, np.nan))
+    return pd.DataFrame(result, index=columns, columns=columns)
+
+
+def top_correlated_pairs(matrix: pd.DataFrame, k: int) -> list[dict]:
+    """The k most strongly correlated distinct column pairs by |r|"""
+    values = matrix.to_numpy()
+    i, j = np.triu_indices(len(matrix), k=1)
+    r = values[i, j]
+    keep = ~np.isnan(r)
+    i, j, r = i[keep], j[keep], r[keep]
+
+    k = min(k, r.size)
+    strongest = np.argpartition(-np.abs(r), k - 1)[:k] if k else []
+    strongest = sorted(strongest, key=lambda idx: -abs(r[idx]))
+    return [
+        {
+            "feature1": matrix.columns[i[idx]],
+            "feature2": matrix.columns[j[idx]],
+            "correlation": float(r[idx]),
+        }
+        for idx in strongest
+    ]
@@ -1,10 +1,18 @@
-import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor
+import time
 from io import StringIO
 
 import pandas as pd
 
+from .categorical_profiler import profile_categorical_columns
+from .compute_pool import compute_pool
+from .dataframe_cache import dataframe_cache, file_fingerprint
+from .dtype_optimizer import memory_report
+from .fused_stats import compute_fused_stats
+from .ingest import read_reference
+from .sketches import should_approximate, sketch_columns
+from .streaming_stats import compute_streaming_stats, should_stream
+
 
 class DataSummary:
     def __init__(self, file_path: str):
@@ -13,36 +21,75 @@ class DataSummary:
 
         self.file_path = file_path
         self._df = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
 
     async def load_data(self, force_reload=False):
         if self._df is None or force_reload:
-            self._df = await asyncio.to_thread(pd.read_csv, self.file_path)
+            if force_reload:
+                dataframe_cache.invalidate(self.file_path)
+            self._df = await dataframe_cache.get_or_load(self.file_path)
 
     async def get_df(self) -> pd.DataFrame:
         await self.load_data()
         return self._df
 
     @staticmethod
-    async def execute_parallel(func, df):
-        return await asyncio.to_thread(func, df)
+    async def execute_parallel(func, df, *args, heavy=False):
+        return await compute_pool.run(func, df, *args, heavy=heavy)
+
+    async def get_file_info(self, reference=None):
+        """Name and size in MB; the name is the one the referencing session
+        uploaded the file under, or the stored name without a reference"""
+        name = os.path.basename(self.file_path)
+        if reference is not None:
+            name = read_reference(self.file_path, reference).get(
+                "original_filename", name
+            )
+        return name, round(os.path.getsize(self.file_path) / (1024 * 1024), 4)
 
-    async def get_file_info(self):
-        return os.path.basename(self.file_path), round(
-            os.path.getsize(self.file_path) / (1024 * 1024), 4
+    @staticmethod
+    async def _approximate_description(df):
+        numeric = df.select_dtypes(include=["number"])
+        sketches = await sketch_columns(
+            [numeric[column].to_numpy(dtype="float64") for column in numeric.columns]
+        )
+        description = pd.DataFrame(
+            {
+                "count": numeric.count(),
+                "mean": numeric.mean(),
+                "std": numeric.std(),
+                "min": numeric.min(),
+            }
         )
+        quantiles = pd.DataFrame(
+            [sketch.quantiles([0.25, 0.5, 0.75]) for sketch in sketches],
+            index=numeric.columns,
+            columns=["25%", "50%", "75%"],
+        )
+        description = description.join(quantiles)
+        description["max"] = numeric.max()
+        return description.T
 
-    async def get_data_description(self):
+    async def get_data_description(self, exact=False):
+        """describe(), with sketched quartiles on large data unless exact"""
         df = await self.get_df()
+        if should_approximate(len(df), exact):
+            return await self._approximate_description(df), True
+        return await self.execute_parallel(self._describe, df, heavy=True), False
+
+    @staticmethod
+    def _describe(df):
         return df.describe()
 
-    async def get_data_info(self):
-        df = await self.get_df()
+    @staticmethod
+    def _get_data_info(df):
         buffer = StringIO()
-        await asyncio.to_thread(df.info, buf=buffer)
-        buffer.seek(0)
+        df.info(buf=buffer)
         return buffer.getvalue()
 
+    async def get_data_info(self):
+        df = await self.get_df()
+        return await self.execute_parallel(self._get_data_info, df), memory_report(df)
+
     @staticmethod
     def _get_data_types(df):
         return df.dtypes.astype(str)
@@ -51,34 +98,56 @@ class DataSummary:
         return await self.execute_parallel(self._get_data_types, await self.get_df())
 
     @staticmethod
-    def _get_categorical_columns_count(df):
-        return (
-            df.select_dtypes(include=["object", "category"])
-            .apply(pd.Series.value_counts)
-            .fillna("none")
-        )
+    def _get_categorical_columns_count(df, exact):
+        return profile_categorical_columns(df, exact)
 
-    async def get_categorical_columns_count(self):
+    async def get_categorical_columns_count(self, exact=False):
         return await self.execute_parallel(
-            self._get_categorical_columns_count, await self.get_df()
+            self._get_categorical_columns_count, await self.get_df(), exact
         )
 
     async def get_row_col_count(self):
         df = await self.get_df()
-        return await asyncio.to_thread(lambda: df.shape)
+        return df.shape
 
     async def get_null_val_count(self):
         df = await self.get_df()
         missing_values = df.isnull().sum()
         return missing_values, (missing_values / len(df)) * 100
 
-    async def get_all_stats(self):
-        return await asyncio.gather(
-            self.get_file_info(),
-            self.get_row_col_count(),
-            self.get_null_val_count(),
-            self.get_data_description(),
-            self.get_data_info(),
-            self.get_data_types(),
-            self.get_categorical_columns_count(),
+    async def get_streaming_stats(self):
+        """All stats in one chunked pass, for files too large to load whole"""
+        start = time.perf_counter()
+        stats = await compute_pool.run(
+            compute_streaming_stats, self.file_path, heavy=True
+        )
+        return (
+            (stats.rows, len(stats.columns)),
+            stats.null_counts(),
+            (stats.description(), True),
+            (stats.info_text(), None),
+            stats.data_types(),
+            stats.categorical_profiles(),
+            {"total": round((time.perf_counter() - start) * 1000, 3)},
+        )
+
+    async def get_all_stats(self, exact=False):
+        if (
+            not exact
+            and should_stream(self.file_path)
+            and dataframe_cache.get(file_fingerprint(self.file_path)) is None
+        ):
+            # Only stream when nothing, e.g. the upload, has cached the frame
+            return await self.get_streaming_stats()
+
+        df = await self.get_df()
+        stats = await compute_fused_stats(df, exact)
+        return (
+            df.shape,
+            stats.null_counts(),
+            stats.description(),
+            (stats.info_text(), stats.memory_usage()),
+            stats.data_types(),
+            stats.categorical_profiles(),
+            stats.timings,
         )
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .dtype_optimizer import optimize_if_enabled
+from .ingest import has_fresh_mapped, read_dataset, read_mapped, write_mapped
+from .shared_frames import SharedFrame
+
+DATAFRAME_CACHE_MAX_MB = float(os.getenv("DATAFRAME_CACHE_MAX_MB", "1024"))
+DATASET_MMAP = os.getenv("DATASET_MMAP", "0") == "1"
+
+
+def file_fingerprint(file_path: str) -> tuple[str, int, int]:
+    """Identify a file by (absolute path, size, mtime) so edits invalidate it"""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+def cacheable_frame(file_path: str, df: pd.DataFrame) -> pd.DataFrame:
+    """The form a freshly parsed dataset is cached in.
+
+    With DATASET_MMAP the optimized frame is written as Arrow IPC and reopened
+    memory-mapped, so every worker process shares its pages. Data Arrow cannot
+    hold stays an ordinary in-memory frame.
+    """
+    df = optimize_if_enabled(df)
+    if not DATASET_MMAP:
+        return df
+    try:
+        write_mapped(file_path, df)
+    except Exception:
+        return df
+    return read_mapped(file_path)
+
+
+def load_dataset(file_path: str) -> pd.DataFrame:
+    """Default loader: read the dataset and apply the configured dtype pass"""
+    if DATASET_MMAP and has_fresh_mapped(file_path):
+        return read_mapped(file_path)
+    return cacheable_frame(file_path, read_dataset(file_path))
+
+
+def load_columns(file_path: str, columns: list[str]) -> pd.DataFrame:
+    """Column-projected counterpart of load_dataset"""
+    if DATASET_MMAP and has_fresh_mapped(file_path):
+        return read_mapped(file_path, columns)
+    return optimize_if_enabled(read_dataset(file_path, columns))
+
+
+def _memory_size(obj: pd.DataFrame | pd.Series) -> int:
+    usage = obj.memory_usage(deep=True)
+    return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+
+
+class DataFrameCache:
+    """Process-wide LRU cache of parsed DataFrames bounded by memory size.
+
+    Besides whole frames it holds individual columns, keyed by the file
+    fingerprint plus the column name, for endpoints that project columns.
+    Frames handed to worker processes also get a shared-memory copy, which
+    lives exactly as long as their cache entry and counts toward the budget.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, asyncio.Lock] = {}
+        self._shared: dict[tuple, SharedFrame] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _peek(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, df: pd.DataFrame | pd.Series):
+        size = _memory_size(df)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (df, size)
+            self._current_bytes += size
+            self._shrink()
+
+    def _shrink(self):
+        # Callers hold self._lock
+        while self._current_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        # Callers hold self._lock
+        self._current_bytes -= self._entries.pop(key)[1]
+        shared = self._shared.pop(key, None)
+        if shared is not None:
+            self._current_bytes -= shared.nbytes
+            shared.discard()
+
+    def _key_of(self, df: pd.DataFrame) -> tuple | None:
+        # Callers hold self._lock
+        return next(
+            (key for key, (cached, _) in self._entries.items() if cached is df), None
+        )
+
+    def acquire_shared(self, df: pd.DataFrame) -> SharedFrame | None:
+        """The shared-memory copy of a cached frame, created on first use.
+
+        The copy is built without holding the cache lock and is charged to the
+        memory budget along with its entry. It is acquired for the caller, who
+        must release() it. None means df is not a cached frame.
+        """
+        with self._lock:
+            key = self._key_of(df)
+            if key is None:
+                return None
+            shared = self._shared.get(key)
+            if shared is not None:
+                shared.acquire()
+                return shared
+
+        created = SharedFrame(df)
+        created.acquire()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not df:
+                # Evicted meanwhile: the copy serves this caller only
+                created.discard()
+                return created
+            shared = self._shared.get(key)
+            if shared is None:
+                self._shared[key] = created
+                self._current_bytes += created.nbytes
+                self._entries.move_to_end(key)
+                self._shrink()
+                return created
+            shared.acquire()
+        # Another caller published its copy first
+        created.release()
+        created.discard()
+        return shared
+
+    def invalidate(self, file_path: str) -> int:
+        """Drop every cached version of a file, returning how many were removed"""
+        abs_path = os.path.abspath(file_path)
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == abs_path]
+            for key in stale:
+                self._remove(key)
+        for key in [key for key in self._load_locks if key[0] == abs_path]:
+            self._load_locks.pop(key, None)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared_frames": len(self._shared),
+                "shared_bytes": sum(shared.nbytes for shared in self._shared.values()),
+            }
+
+    async def get_or_load(self, file_path: str, loader=load_dataset) -> pd.DataFrame:
+        key = file_fingerprint(file_path)
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        # Concurrent requests for the same file wait for a single parse
+        lock = self._load_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+
+            df = await asyncio.to_thread(loader, file_path)
+            self.put(key, df)
+            self._load_locks.pop(key, None)
+            return df
+
+    async def get_columns(
+        self, file_path: str, columns: list[str], loader=load_columns
+    ) -> pd.DataFrame:
+        """Return only the requested columns, reading just the ones not cached"""
+        key = file_fingerprint(file_path)
+        columns = list(dict.fromkeys(columns))
+        df = self._peek(key)
+        if df is not None:
+            self.hits += 1
+            return df[columns]
+
+        loaded = {}
+        missing = []
+        for column in columns:
+            series = self.get(key + (column,))
+            if series is None:
+                missing.append(column)
+            else:
+                loaded[column] = series
+
+        if missing:
+            projected = await asyncio.to_thread(loader, file_path, missing)
+            for column in missing:
+                loaded[column] = projected[column]
+                self.put(key + (column,), projected[column])
+
+        return pd.DataFrame(loaded)
+
+
+dataframe_cache = DataFrameCache(max_bytes=int(DATAFRAME_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_float_dtype,
+    is_integer_dtype,
+    is_object_dtype,
+    is_string_dtype,
+)
+
+OPTIMIZE_DTYPES = os.getenv("DATAFRAME_OPTIMIZE_DTYPES", "0") == "1"
+DOWNCAST_FLOAT32 = os.getenv("DATAFRAME_DOWNCAST_FLOAT32", "0") == "1"
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+
+
+def _downcast_float(series: pd.Series, force_float32: bool) -> pd.Series:
+    downcast = series.astype(np.float32)
+    if force_float32:
+        return downcast
+    # Keep float64 unless every value survives the round trip unchanged
+    restored = downcast.astype(series.dtype)
+    if ((restored == series) | series.isna()).all():
+        return downcast
+    return series
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    force_float32: bool = DOWNCAST_FLOAT32,
+    category_max_unique_ratio: float = CATEGORY_MAX_UNIQUE_RATIO,
+) -> pd.DataFrame:
+    """Shrink a DataFrame's memory footprint.
+
+    Integers are downcast losslessly, floats move to float32 when exact (or
+    always with force_float32), and string columns with few distinct values
+    become categoricals. The before/after sizes are kept in
+    ``df.attrs["memory_usage"]``.
+    """
+    before_bytes = int(df.memory_usage(deep=True).sum())
+    optimized = {}
+
+    for column in df.columns:
+        series = df[column]
+        if is_integer_dtype(series):
+            series = pd.to_numeric(series, downcast="integer")
+        elif is_float_dtype(series):
+            series = _downcast_float(series, force_float32)
+        elif (is_object_dtype(series) or is_string_dtype(series)) and len(series):
+            if series.nunique() / len(series) <= category_max_unique_ratio:
+                series = series.astype("category")
+        optimized[column] = series
+
+    result = pd.DataFrame(optimized, index=df.index)
+    result.attrs["memory_usage"] = {
+        "optimized": True,
+        "before_bytes": before_bytes,
+        "after_bytes": int(result.memory_usage(deep=True).sum()),
+    }
+    return result
+
+
+def optimize_if_enabled(df: pd.DataFrame) -> pd.DataFrame:
+    return optimize_dtypes(df) if OPTIMIZE_DTYPES else df
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    """Before/after memory of a loaded frame, computing it when not optimized"""
+    if "memory_usage" in df.attrs:
+        return df.attrs["memory_usage"]
+    size = int(df.memory_usage(deep=True).sum())
+    return {"optimized": False, "before_bytes": size, "after_bytes": size}
@@ -0,0 +1,199 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .categorical_profiler import profile_categorical_column
+from .compute_pool import compute_pool
+from .sketches import SKETCH_CHUNK_ROWS, KLLSketch, should_approximate, sketch_chunks
+from .streaming_stats import format_info_text
+
+SECTIONS = [
+    "missing_values",
+    "data_description",
+    "data_info",
+    "data_types",
+    "categorical_columns",
+]
+
+
+class SectionTimer:
+    """Accumulated seconds spent per all_stats section"""
+
+    def __init__(self):
+        self.elapsed = defaultdict(float)
+
+    @contextmanager
+    def section(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.elapsed[name] += time.perf_counter() - start
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ["bytes", "KB", "MB", "GB", "TB"]:
+        if size < 1024 or unit == "TB":
+            return f"{size:3.1f} {unit}"
+        size /= 1024
+
+
+def _describe_values(valid: np.ndarray, approximate: bool) -> dict:
+    """describe() of the non-null values of one numeric column"""
+    count = valid.size
+    if count == 0:
+        return {"count": 0.0} | dict.fromkeys(
+            ["mean", "std", "min", "25%", "50%", "75%", "max"], np.nan
+        )
+
+    if approximate:
+        sketch = KLLSketch()
+        for chunk in sketch_chunks(valid, SKETCH_CHUNK_ROWS):
+            sketch.update(chunk)
+        q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+        low, high = valid.min(), valid.max()
+    else:
+        # One partition yields the extremes and the quartiles together
+        low, q1, median, q3, high = np.quantile(valid, [0, 0.25, 0.5, 0.75, 1])
+
+    return {
+        "count": float(count),
+        "mean": valid.mean(),
+        "std": valid.std(ddof=1) if count > 1 else np.nan,
+        "min": low,
+        "25%": q1,
+        "50%": median,
+        "75%": q3,
+        "max": high,
+    }
+
+
+def _column_stats(
+    df: pd.DataFrame,
+    column,
+    numeric: bool,
+    categorical: bool,
+    approximate: bool,
+    exact: bool,
+) -> dict:
+    """Every all_stats figure of one column, touching its data once"""
+    timer = SectionTimer()
+    stats = {}
+    series = df[column]
+
+    with timer.section("data_types"):
+        stats["dtype"] = series.dtype
+    with timer.section("data_info"):
+        stats["memory_bytes"] = int(series.memory_usage(deep=True, index=False))
+
+    if numeric:
+        with timer.section("missing_values"):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            stats["null_count"] = values.size - valid.size
+        with timer.section("data_description"):
+            stats["description"] = _describe_values(valid, approximate)
+    else:
+        with timer.section("missing_values"):
+            stats["null_count"] = int(series.isna().sum())
+
+    if categorical:
+        with timer.section("categorical_columns"):
+            stats["categorical_profile"] = profile_categorical_column(series, exact)
+
+    stats["elapsed"] = timer.elapsed
+    return stats
+
+
+class FusedStats:
+    """The in-memory all_stats sections, assembled from per-column passes"""
+
+    def __init__(self, df: pd.DataFrame, columns: dict, approximate: bool):
+        self.df = df
+        self.rows = len(df)
+        self.columns = columns
+        self.approximate = approximate
+        self.timings: dict[str, float] = {}
+
+    def null_counts(self) -> tuple[pd.Series, pd.Series]:
+        missing = pd.Series(
+            {name: stats["null_count"] for name, stats in self.columns.items()},
+            dtype="int64",
+        )
+        percentage = (missing / self.rows) * 100 if self.rows else missing * 0.0
+        return missing, percentage
+
+    def description(self) -> tuple[pd.DataFrame, bool]:
+        described = {
+            name: stats["description"]
+            for name, stats in self.columns.items()
+            if "description" in stats
+        }
+        if not described:
+            # describe() summarises the non-numeric columns instead
+            return self.df.describe(), False
+        return pd.DataFrame(described), self.approximate
+
+    def data_types(self) -> pd.Series:
+        return pd.Series(
+            {name: str(stats["dtype"]) for name, stats in self.columns.items()},
+            dtype=str,
+        )
+
+    def memory_usage(self) -> dict:
+        if "memory_usage" in self.df.attrs:
+            return self.df.attrs["memory_usage"]
+        size = int(self.df.index.memory_usage()) + sum(
+            stats["memory_bytes"] for stats in self.columns.values()
+        )
+        return {"optimized": False, "before_bytes": size, "after_bytes": size}
+
+    def info_text(self) -> str:
+        return format_info_text(
+            self.rows,
+            [
+                (name, self.rows - stats["null_count"], stats["dtype"])
+                for name, stats in self.columns.items()
+            ],
+            _format_bytes(self.memory_usage()["after_bytes"]),
+        )
+
+    def categorical_profiles(self) -> dict:
+        return {
+            name: stats["categorical_profile"]
+            for name, stats in self.columns.items()
+            if "categorical_profile" in stats
+        }
+
+
+async def compute_fused_stats(df: pd.DataFrame, exact: bool = False) -> FusedStats:
+    """Compute all_stats with one pass per column, columns in parallel.
+
+    ``timings`` reports the time spent per section (summed over columns)
+    and the wall-clock total, in milliseconds.
+    """
+    start = time.perf_counter()
+    numeric = set(df.select_dtypes(include=["number"]).columns)
+    categorical = set(df.select_dtypes(include=["object", "category"]).columns)
+    approximate = should_approximate(len(df), exact)
+
+    results = await compute_pool.map(
+        _column_stats,
+        [
+            (df, column, column in numeric, column in categorical, approximate, exact)
+            for column in df.columns
+        ],
+        heavy=True,
+    )
+    stats = FusedStats(df, dict(zip(df.columns, results)), approximate)
+
+    elapsed = defaultdict(float)
+    for result in results:
+        for section, seconds in result["elapsed"].items():
+            elapsed[section] += seconds
+    stats.timings = {section: round(elapsed[section] * 1000, 3) for section in SECTIONS}
+    stats.timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+    return stats
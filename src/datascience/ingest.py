@@ -0,0 +1,248 @@
+import fcntl
+import json
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+COLUMNAR_SUFFIX = ".parquet"
+MAPPED_SUFFIX = ".arrow"
+REFERENCES_SUFFIX = ".refs"
+REFERENCE_SUFFIX = ".ref"
+LOCK_SUFFIX = ".lock"
+# String columns with at most this share of distinct values are mapped as codes
+MAPPED_DICTIONARY_MAX_RATIO = 0.5
+
+
+def columnar_path(file_path: str) -> str:
+    """Location of the typed columnar copy kept next to an uploaded CSV"""
+    return os.path.splitext(file_path)[0] + COLUMNAR_SUFFIX
+
+
+def references_dir(file_path: str) -> str:
+    """Directory holding one marker file per session using an upload.
+
+    Markers live on disk so the count survives restarts and is shared by
+    every worker process. Each marker also records the name the session
+    uploaded the file under.
+    """
+    return os.path.splitext(file_path)[0] + REFERENCES_SUFFIX
+
+
+@contextmanager
+def reference_lock(file_path: str):
+    """Exclusive lock serializing reference changes to one upload.
+
+    The lock file is deleted together with the upload, so a lock taken on a
+    file that was unlinked meanwhile is dropped and taken again.
+    """
+    path = os.path.splitext(file_path)[0] + LOCK_SUFFIX
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    try:
+        yield path
+    finally:
+        os.close(fd)
+
+
+def add_reference(file_path: str, original_filename: str) -> str:
+    """Record a session using an upload; returns the reference id"""
+    refs_dir = references_dir(file_path)
+    os.makedirs(refs_dir, exist_ok=True)
+    fd, marker = tempfile.mkstemp(dir=refs_dir, suffix=REFERENCE_SUFFIX)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"original_filename": original_filename}, f)
+    return os.path.basename(marker)[: -len(REFERENCE_SUFFIX)]
+
+
+def _marker_path(file_path: str, reference: str) -> str:
+    if not reference or os.path.basename(reference) != reference:
+        raise ValueError(f"Invalid upload reference: {reference!r}")
+    return os.path.join(references_dir(file_path), reference + REFERENCE_SUFFIX)
+
+
+def read_reference(file_path: str, reference: str) -> dict:
+    """What a reference recorded at upload, or {} if it is unknown"""
+    try:
+        with open(_marker_path(file_path, reference)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def release_reference(file_path: str, reference: str | None = None) -> bool:
+    """Drop a reference, or any one without an id; True when no session uses
+    the upload any more"""
+    refs_dir = references_dir(file_path)
+    if reference is not None:
+        markers = [_marker_path(file_path, reference)]
+    else:
+        try:
+            markers = [os.path.join(refs_dir, m) for m in os.listdir(refs_dir)]
+        except FileNotFoundError:
+            return True  # stored before references were tracked
+    for marker in markers:
+        try:
+            os.remove(marker)
+            break
+        except FileNotFoundError:
+            continue  # already released
+    try:
+        os.rmdir(refs_dir)
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False  # other references remain
+    return True
+
+
+def has_fresh_columnar(file_path: str) -> bool:
+    parquet_path = columnar_path(file_path)
+    return os.path.isfile(parquet_path) and os.path.getmtime(
+        parquet_path
+    ) >= os.path.getmtime(file_path)
+
+
+def convert_to_columnar(file_path: str) -> pd.DataFrame:
+    """Parse the CSV once and persist it as Parquet.
+
+    Returns the parsed DataFrame so the caller can reuse it. Data that cannot
+    be represented in Parquet keeps only the CSV, which readers fall back to.
+    """
+    df = pd.read_csv(file_path)
+    parquet_path = columnar_path(file_path)
+    # Unique temp name: identical uploads may be converted concurrently, in
+    # threads of one process as well as in separate workers
+    tmp_path = f"{parquet_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df
+
+
+def mapped_path(file_path: str) -> str:
+    """Location of the memory-mappable Arrow IPC copy of an uploaded CSV"""
+    return os.path.splitext(file_path)[0] + MAPPED_SUFFIX
+
+
+def has_fresh_mapped(file_path: str) -> bool:
+    arrow_path = mapped_path(file_path)
+    return os.path.isfile(arrow_path) and os.path.getmtime(
+        arrow_path
+    ) >= os.path.getmtime(file_path)
+
+
+def _mappable_table(df: pd.DataFrame) -> pa.Table:
+    # Floats keep NaN as a value rather than a null, so they convert to pandas
+    # as views of the mapped pages. Strings never do: object columns are
+    # rebuilt as Python strings in every process. Repetitive ones are stored
+    # dictionary-encoded instead, so only their distinct values are rebuilt
+    # and the codes are mapped; they load as categoricals.
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = table.schema.metadata
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type):
+            array = pa.array(df[field.name].to_numpy(), from_pandas=False)
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            array = table.column(i).combine_chunks().dictionary_encode()
+            if len(array.dictionary) > MAPPED_DICTIONARY_MAX_RATIO * len(array):
+                continue
+        else:
+            continue
+        table = table.set_column(i, field.with_type(array.type), array)
+    return table.replace_schema_metadata(metadata)
+
+
+def write_mapped(file_path: str, df: pd.DataFrame):
+    """Persist a parsed dataset as an uncompressed Arrow IPC file"""
+    table = _mappable_table(df)
+    arrow_path = mapped_path(file_path)
+    # Unique temp name: several workers, or threads of one, may convert the
+    # same file at once
+    tmp_path = f"{arrow_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, arrow_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_mapped(file_path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Open the Arrow copy memory-mapped; numeric columns and the codes of
+    dictionary-encoded strings view the mapped pages, so processes reading the
+    same file share one physical copy of them through the page cache.
+    """
+    table = ipc.open_file(pa.memory_map(mapped_path(file_path))).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+
+def read_dataset(file_path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read an uploaded dataset, preferring its columnar copy over the CSV"""
+    if has_fresh_columnar(file_path):
+        return pd.read_parquet(columnar_path(file_path), columns=columns)
+    return pd.read_csv(file_path, usecols=columns)
+
+
+def iter_dataset_chunks(file_path: str, chunk_rows: int, columns=None, dtype=None):
+    """Yield the dataset as DataFrames of at most chunk_rows rows.
+
+    With a dtype every non-null value is converted to it and nulls stay null.
+    """
+    if has_fresh_columnar(file_path):
+        parquet_file = pq.ParquetFile(columnar_path(file_path))
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            chunk = batch.to_pandas()
+            if dtype is not None:
+                chunk = chunk.astype(dtype).mask(chunk.isna())
+            yield chunk
+    else:
+        with pd.read_csv(
+            file_path, chunksize=chunk_rows, usecols=columns, dtype=dtype
+        ) as reader:
+            yield from reader
+
+
+def dataset_columns(file_path: str) -> list[str]:
+    """Column names without reading any rows"""
+    if has_fresh_columnar(file_path):
+        return pq.read_schema(columnar_path(file_path)).names
+    return pd.read_csv(file_path, nrows=0).columns.tolist()
+
+
+def sample_dtypes(file_path: str, nrows: int) -> dict[str, str]:
+    """Column dtypes from the Parquet schema, or inferred from the first rows"""
+    if has_fresh_columnar(file_path):
+        schema = pq.read_schema(columnar_path(file_path))
+        dtypes = schema.empty_table().to_pandas().dtypes
+    else:
+        dtypes = pd.read_csv(file_path, nrows=nrows).dtypes
+    return dtypes.astype(str).to_dict()
+
+
+def remove_columnar(file_path: str) -> bool:
+    removed = False
+    for path in (columnar_path(file_path), mapped_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    return removed
@@ -0,0 +1,390 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_MAX_BINS = int(os.getenv("HISTOGRAM_MAX_BINS", "100"))
+HISTOGRAM_MAX_RAW_ROWS = int(os.getenv("HISTOGRAM_MAX_RAW_ROWS", "10000"))
+LINE_PLOT_MAX_POINTS = int(os.getenv("LINE_PLOT_MAX_POINTS", "2000"))
+SCATTER_DENSITY_MIN_ROWS = int(os.getenv("SCATTER_DENSITY_MIN_ROWS", "50000"))
+SCATTER_GRIDSIZE = int(os.getenv("SCATTER_GRIDSIZE", "100"))
+SCATTER_SAMPLE_SIZE = int(os.getenv("SCATTER_SAMPLE_SIZE", "5000"))
+BOX_PLOT_MAX_OUTLIERS = int(os.getenv("BOX_PLOT_MAX_OUTLIERS", "1000"))
+BOX_PLOT_MAX_GROUPS = int(os.getenv("BOX_PLOT_MAX_GROUPS", "50"))
+PAIR_PLOT_MAX_ROWS = int(os.getenv("PAIR_PLOT_MAX_ROWS", "2000"))
+PAIR_PLOT_MAX_COLUMNS = int(os.getenv("PAIR_PLOT_MAX_COLUMNS", "6"))
+# Strata are sampled only when each could get this many rows on average
+PAIR_PLOT_MIN_STRATUM_ROWS = 10
+HISTOGRAM_BIN_RULES = (
+    "auto",
+    "fd",
+    "doane",
+    "scott",
+    "stone",
+    "rice",
+    "sturges",
+    "sqrt",
+)
+
+
+def parse_bins(bins: str) -> int | str:
+    """A bin count or one of numpy's bin-width estimators"""
+    if bins.isdigit() and 0 < int(bins) <= HISTOGRAM_MAX_BINS:
+        return int(bins)
+    if bins in HISTOGRAM_BIN_RULES:
+        return bins
+    raise ValueError(
+        f"bins must be 1-{HISTOGRAM_MAX_BINS} or one of {', '.join(HISTOGRAM_BIN_RULES)}"
+    )
+
+
+def _spread_bin_count(finite: np.ndarray, bins: str) -> int | None:
+    """Bins numpy's spread-based estimators would produce, without building
+    the edges.
+
+    "fd", "scott" and "auto" size bins from the IQR or standard deviation,
+    so one far outlier can ask for billions of edges. The count-based rules
+    are bounded by about sqrt(n) and return None here.
+    """
+    n = finite.size
+    span = np.ptp(finite)
+    if bins in ("fd", "auto"):
+        q25, q75 = np.percentile(finite, [25, 75])
+        width = 2.0 * (q75 - q25) * n ** (-1 / 3)
+        if bins == "auto":
+            sturges = span / (np.log2(n) + 1.0)
+            width = min(width, sturges) if width else sturges
+    elif bins == "scott":
+        width = (24.0 * np.pi**0.5 / n) ** (1 / 3) * np.std(finite)
+    else:
+        return None
+    if not (span > 0 and width > 0):
+        return None
+    return math.ceil(span / width)
+
+
+def histogram(series: pd.Series, bins: int | str) -> dict:
+    """Bin edges and counts of one numeric column.
+
+    Estimators that would produce more than HISTOGRAM_MAX_BINS bins (e.g.
+    Freedman-Diaconis on millions of rows, or with far outliers) are capped
+    to that many before any edges are built.
+    """
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {"edges": [], "counts": [], "missing": int(values.size)}
+
+    if isinstance(bins, str):
+        count = _spread_bin_count(finite, bins)
+        if count is not None and count > HISTOGRAM_MAX_BINS:
+            bins = HISTOGRAM_MAX_BINS
+    edges = np.histogram_bin_edges(finite, bins=bins)
+    if edges.size - 1 > HISTOGRAM_MAX_BINS:
+        edges = np.histogram_bin_edges(finite, bins=HISTOGRAM_MAX_BINS)
+    counts, edges = np.histogram(finite, bins=edges)
+    return {
+        "edges": edges.tolist(),
+        "counts": counts.tolist(),
+        "missing": int(values.size - finite.size),
+    }
+
+
+def histograms(df: pd.DataFrame, bins: int | str) -> dict:
+    return {column: histogram(df[column], bins) for column in df.columns}
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: positions of max_points points that
+    keep the visual shape of the series.
+
+    The first and last points are kept; every bucket in between contributes
+    the point forming the largest triangle with the previously selected
+    point and the mean of the next bucket. Bucket means are computed for all
+    buckets at once, so the per-bucket loop only does an argmax.
+    """
+    n = y.size
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+    # The bucket after the last one is the final point itself
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        area = np.abs(
+            (x[a] - next_x[bucket]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y[bucket] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample(series: pd.Series, max_points: int) -> pd.Series:
+    """Non-null values of a column reduced to at most max_points (0 keeps all),
+    indexed by their row position"""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    positions = np.flatnonzero(~np.isnan(values))
+    values = values[positions]
+    if max_points:
+        keep = lttb_indices(positions.astype(np.float64), values, max_points)
+        positions, values = positions[keep], values[keep]
+    return pd.Series(values, index=positions)
+
+
+def downsample_columns(df: pd.DataFrame, max_points: int) -> dict:
+    return {column: downsample(df[column], max_points) for column in df.columns}
+
+
+def _finite_pairs(
+    df: pd.DataFrame, feature1, feature2
+) -> tuple[np.ndarray, np.ndarray]:
+    x = df[feature1].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df[feature2].to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+def _span(values: np.ndarray) -> tuple[float, float]:
+    low, high = float(values.min()), float(values.max())
+    # A constant axis still gets a non-empty extent to bin over
+    return (low - 0.5, high + 0.5) if low == high else (low, high)
+
+
+def rect_density(x: np.ndarray, y: np.ndarray, gridsize: int) -> dict:
+    counts, x_edges, y_edges = np.histogram2d(
+        x, y, bins=gridsize, range=[_span(x), _span(y)]
+    )
+    return {
+        "x_edges": x_edges,
+        "y_edges": y_edges,
+        # Row-major by y so the grid renders directly as a heatmap
+        "counts": counts.T.astype(np.int64),
+    }
+
+
+def hex_density(x: np.ndarray, y: np.ndarray, gridsize: int) -> dict:
+    """Counts on a hexagonal grid (two offset rectangular lattices, as in
+    matplotlib's hexbin), returning only non-empty cells"""
+    (xmin, xmax), (ymin, ymax) = _span(x), _span(y)
+    nx = gridsize
+    ny = max(int(nx / np.sqrt(3)), 1)
+    sx, sy = (xmax - xmin) / nx, (ymax - ymin) / ny
+    px, py = (x - xmin) / sx, (y - ymin) / sy
+
+    ix1, iy1 = np.round(px).astype(np.int64), np.round(py).astype(np.int64)
+    # Points on the upper edges belong to the last cell of the offset lattice
+    ix2 = np.minimum(np.floor(px).astype(np.int64), nx - 1)
+    iy2 = np.minimum(np.floor(py).astype(np.int64), ny - 1)
+    d1 = (px - ix1) ** 2 + 3.0 * (py - iy1) ** 2
+    d2 = (px - ix2 - 0.5) ** 2 + 3.0 * (py - iy2 - 0.5) ** 2
+    on_first = d1 < d2
+
+    ny1, ny2 = ny + 1, ny
+    first = np.bincount(ix1[on_first] * ny1 + iy1[on_first], minlength=(nx + 1) * ny1)
+    second = np.bincount(ix2[~on_first] * ny2 + iy2[~on_first], minlength=nx * ny2)
+
+    cx1, cy1 = np.divmod(np.arange(first.size), ny1)
+    cx2, cy2 = np.divmod(np.arange(second.size), ny2)
+    centers_x = np.concatenate([cx1 * sx, (cx2 + 0.5) * sx]) + xmin
+    centers_y = np.concatenate([cy1 * sy, (cy2 + 0.5) * sy]) + ymin
+    counts = np.concatenate([first, second])
+    occupied = counts > 0
+    return {
+        "x": centers_x[occupied],
+        "y": centers_y[occupied],
+        "counts": counts[occupied],
+        "hex_width": sx,
+    }
+
+
+def scatter_density(
+    df: pd.DataFrame, feature1, feature2, grid: str, gridsize: int
+) -> dict:
+    x, y = _finite_pairs(df, feature1, feature2)
+    result = {"grid": grid, "gridsize": gridsize, "points": int(x.size)}
+    if x.size:
+        binned = hex_density if grid == "hex" else rect_density
+        result |= binned(x, y, gridsize)
+    return result
+
+
+def scatter_sample(
+    df: pd.DataFrame, feature1, feature2, sample_size: int, seed: int
+) -> dict:
+    """A reproducible sample of at most sample_size rows under "data".
+
+    Each axis' extreme rows come first out of the budget so the view keeps
+    its outliers and full range; the rest is a uniform sample of the others.
+    """
+    x, y = _finite_pairs(df, feature1, feature2)
+    if x.size > sample_size:
+        extremes = np.unique([x.argmin(), x.argmax(), y.argmin(), y.argmax()])
+        extremes = extremes[:sample_size]
+        others = np.delete(np.arange(x.size), extremes)
+        rng = np.random.default_rng(seed)
+        sampled = rng.choice(others, size=sample_size - extremes.size, replace=False)
+        positions = np.sort(np.concatenate([extremes, sampled]))
+        x, y = x[positions], y[positions]
+    return {
+        "points": int(x.size),
+        "data": pd.DataFrame({feature1: np.round(x, 2), feature2: np.round(y, 2)}),
+    }
+
+
+def partition_quantiles(values: np.ndarray, qs) -> np.ndarray:
+    """Linearly interpolated quantiles (numpy's and pandas' default) from a
+    single np.partition call instead of a full sort"""
+    positions = np.asarray(qs, dtype=np.float64) * (values.size - 1)
+    low = np.floor(positions).astype(np.int64)
+    high = np.ceil(positions).astype(np.int64)
+    partitioned = np.partition(values, np.unique(np.concatenate([low, high])))
+    fraction = positions - low
+    return partitioned[low] + (partitioned[high] - partitioned[low]) * fraction
+
+
+def box_summary(
+    values: np.ndarray,
+    max_outliers: int = BOX_PLOT_MAX_OUTLIERS,
+    seed: int = 0,
+    quartiles=None,
+) -> dict:
+    """Tukey box statistics and the points beyond the 1.5 IQR fences.
+
+    Whiskers are the most extreme values inside the fences. Beyond
+    max_outliers outliers, exactly max_outliers are returned: the minimum
+    and maximum, then a seeded sample of the rest. quartiles may be passed
+    in, e.g. from a sketch, to skip the partition.
+    """
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"count": 0, "outliers": [], "outlier_count": 0}
+
+    if quartiles is None:
+        quartiles = partition_quantiles(values, [0.25, 0.5, 0.75])
+    q1, median, q3 = (float(q) for q in quartiles)
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    inside = (values >= low_fence) & (values <= high_fence)
+    outliers = values[~inside]
+    whiskers = values[inside] if inside.any() else values
+    summary = {
+        "count": int(values.size),
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "lower_whisker": float(whiskers.min()),
+        "upper_whisker": float(whiskers.max()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "outlier_count": int(outliers.size),
+    }
+    if outliers.size > max_outliers:
+        # The extremes come first out of the budget, a sample of the rest after
+        extremes = np.unique([outliers.argmin(), outliers.argmax()])[:max_outliers]
+        others = np.delete(np.arange(outliers.size), extremes)
+        rng = np.random.default_rng(seed)
+        sampled = rng.choice(others, size=max_outliers - extremes.size, replace=False)
+        outliers = outliers[np.sort(np.concatenate([extremes, sampled]))]
+    summary["outliers"] = np.round(outliers, 2).tolist()
+    return summary
+
+
+def box_summaries(
+    df: pd.DataFrame,
+    feature,
+    group_by=None,
+    max_outliers: int = BOX_PLOT_MAX_OUTLIERS,
+    seed: int = 0,
+) -> dict:
+    """Box statistics of a numeric column, overall or per group.
+
+    Groups are the BOX_PLOT_MAX_GROUPS most frequent values of the group_by
+    column; rows are split with one factorize and one stable argsort.
+    """
+    values = df[feature].to_numpy(dtype=np.float64, na_value=np.nan)
+    if group_by is None:
+        return {"summary": box_summary(values, max_outliers, seed)}
+
+    codes, labels = pd.factorize(df[group_by], sort=True)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(labels))
+    kept = np.sort(np.argsort(-sizes, kind="stable")[:BOX_PLOT_MAX_GROUPS])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    groups = {}
+    for code in kept:
+        rows = order[bounds[code] : bounds[code + 1]]
+        groups[str(labels[code])] = box_summary(values[rows], max_outliers, seed)
+    return {"groups": groups, "group_count": len(labels)}
+
+
+def sample_positions(
+    n: int, max_rows: int, seed: int = 0, strata: pd.Series | None = None
+) -> np.ndarray:
+    """Sorted row positions of a reproducible sample of at most max_rows rows.
+
+    Without strata every row is equally likely. With strata each value gets
+    a share of the sample proportional to its frequency (largest remainder,
+    at least one row per value), so rare classes stay visible; missing
+    strata values form their own group. The one-row minimums would crowd
+    out the proportional shares once there are more than
+    max_rows / PAIR_PLOT_MIN_STRATUM_ROWS values, e.g. for a continuous
+    regression target or an identifier, so then the sample is uniform.
+    """
+    if n <= max_rows:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        return np.sort(rng.choice(n, size=max_rows, replace=False))
+
+    codes, _ = pd.factorize(strata, use_na_sentinel=False)
+    sizes = np.bincount(codes)
+    if sizes.size * PAIR_PLOT_MIN_STRATUM_ROWS > max_rows:
+        return np.sort(rng.choice(n, size=max_rows, replace=False))
+
+    quota = sizes * max_rows / n
+    taken = np.minimum(np.maximum(np.floor(quota), 1), sizes).astype(np.int64)
+    remainder = max_rows - taken.sum()
+    if remainder > 0:
+        # Hand out what the floors left over by largest remainder
+        order = np.argsort(-(quota - np.floor(quota)), kind="stable")
+        order = order[taken[order] < sizes[order]]
+        taken[order[:remainder]] += 1
+    elif remainder < 0:
+        # The one-row minimums overshot: trim the largest strata, not below one
+        order = np.argsort(-sizes, kind="stable")
+        spare = taken[order] - 1
+        trimmed_before = np.cumsum(spare) - spare
+        taken[order] -= np.clip(-remainder - trimmed_before, 0, spare)
+
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    picked = [
+        rng.choice(order[bounds[g] : bounds[g + 1]], size=taken[g], replace=False)
+        for g in range(len(sizes))
+        if taken[g]
+    ]
+    return np.sort(np.concatenate(picked))
+
+
+def pair_sample(
+    df: pd.DataFrame, max_rows: int, seed: int = 0, label=None
+) -> pd.DataFrame:
+    """The numeric columns (and label) of a uniform or label-stratified sample"""
+    strata = df[label] if label is not None else None
+    positions = sample_positions(len(df), max_rows, seed, strata)
+    columns = df.select_dtypes(include=["number"]).columns.tolist()
+    if label is not None and label not in columns:
+        columns.append(label)
+    return df[columns].iloc[positions]
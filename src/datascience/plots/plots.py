@@ -1,8 +1,30 @@
-import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from ..compute_pool import compute_pool
+from ..correlation import correlation_matrix
+from ..dataframe_cache import dataframe_cache, file_fingerprint
+from ..ingest import dataset_columns
+from ..sketches import should_approximate, sketch_column
+from .aggregations import (
+    BOX_PLOT_MAX_OUTLIERS,
+    PAIR_PLOT_MAX_COLUMNS,
+    PAIR_PLOT_MAX_ROWS,
+    SCATTER_DENSITY_MIN_ROWS,
+    SCATTER_GRIDSIZE,
+    SCATTER_SAMPLE_SIZE,
+    box_summaries,
+    box_summary,
+    downsample_columns,
+    histograms,
+    pair_sample,
+    parse_bins,
+    scatter_density,
+    scatter_sample,
+)
 
 
 class Plot:
@@ -12,73 +34,199 @@ class Plot:
 
         self.file_path = file_path
         self._df = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
 
     async def load_data(self, force_reload=False):
         if self._df is None or force_reload:
-            self._df = await asyncio.to_thread(pd.read_csv, self.file_path)
+            if force_reload:
+                dataframe_cache.invalidate(self.file_path)
+            self._df = await dataframe_cache.get_or_load(self.file_path)
 
     async def get_df(self) -> pd.DataFrame:
         await self.load_data()
         return self._df
 
+    async def get_columns(self, columns: list[str]) -> pd.DataFrame:
+        """Load only the given columns instead of the whole file"""
+        if self._df is not None:
+            return self._df[list(dict.fromkeys(columns))]
+        return await dataframe_cache.get_columns(self.file_path, columns)
+
     @staticmethod
-    async def execute_parallel(func, df, *args):
-        return await asyncio.to_thread(func, df, *args)
+    async def execute_parallel(func, df, *args, heavy=False):
+        return await compute_pool.run(func, df, *args, heavy=heavy)
 
     @staticmethod
     def _scatter_plot(df, feature1, feature2):
         return df[[feature1, feature2]]
 
-    async def get_scatter_plot_data(self, feature1, feature2):
-        return await self.execute_parallel(
-            self._scatter_plot, await self.get_df(), feature1, feature2
+    async def get_scatter_plot_data(
+        self,
+        feature1,
+        feature2,
+        mode="auto",
+        grid="rect",
+        gridsize=SCATTER_GRIDSIZE,
+        sample_size=SCATTER_SAMPLE_SIZE,
+        seed=0,
+    ):
+        """Raw points, 2D binned counts or a seeded sample, returned as
+        (mode, data). "auto" bins once the file exceeds SCATTER_DENSITY_MIN_ROWS.
+        """
+        df = await self.get_columns([feature1, feature2])
+        if mode == "auto":
+            mode = "density" if len(df) > SCATTER_DENSITY_MIN_ROWS else "points"
+        if mode == "points":
+            return mode, await self.execute_parallel(
+                self._scatter_plot, df, feature1, feature2
+            )
+
+        non_numeric = [c for c in df.columns if not is_numeric_dtype(df[c])]
+        if non_numeric:
+            raise ValueError(f"Columns are not numeric: {', '.join(non_numeric)}")
+        if mode == "density":
+            return mode, await self.execute_parallel(
+                scatter_density, df, feature1, feature2, grid, gridsize, heavy=True
+            )
+        return mode, await self.execute_parallel(
+            scatter_sample, df, feature1, feature2, sample_size, seed
         )
 
     @staticmethod
     def _histogram_plot(df):
         return df.select_dtypes(include=["number"])
 
-    async def get_histogram_plot_data(self):
-        return await self.execute_parallel(self._histogram_plot, await self.get_df())
+    async def get_histogram_plot_data(self, columns=None, bins="auto", raw_limit=0):
+        """Bin edges and counts per numeric column, plus the first raw_limit rows"""
+        bins = parse_bins(bins)
+        if columns:
+            known = set(dataset_columns(self.file_path))
+            unknown = [c for c in columns if c not in known]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            df = await self.get_columns(columns)
+            non_numeric = [c for c in df.columns if not is_numeric_dtype(df[c])]
+            if non_numeric:
+                raise ValueError(f"Columns are not numeric: {', '.join(non_numeric)}")
+        else:
+            df = self._histogram_plot(await self.get_df())
+
+        result = await self.execute_parallel(histograms, df, bins, heavy=True)
+        return result, df.head(raw_limit) if raw_limit else None
 
     @staticmethod
     def _line_plot(df):
         return df.select_dtypes(include=["number"])
 
-    async def get_line_plot_data(self):
-        return await self.execute_parallel(self._line_plot, await self.get_df())
-
-    @staticmethod
-    def _correlation_matrix(df):
-        return df.select_dtypes(include=["number"]).corr()
-
-    async def get_correlation_matrix_data(self):
-        return await self.execute_parallel(
-            self._correlation_matrix, await self.get_df()
-        )
-
-    @staticmethod
-    def _single_box_plot(df, feature1):
-        return df[feature1]
-
-    async def get_box_plot_data(self, feature1):
-        return await self.execute_parallel(
-            self._single_box_plot, await self.get_df(), feature1
+    async def _downsample(self, df, max_points):
+        """LTTB-reduced columns, cached per (dataset, column, max_points)"""
+        key = file_fingerprint(self.file_path)
+        series, missing = {}, []
+        for column in df.columns:
+            cached = dataframe_cache.get(key + ("downsample", column, max_points))
+            if cached is None:
+                missing.append(column)
+            else:
+                series[column] = cached
+        if missing:
+            computed = await self.execute_parallel(
+                downsample_columns, df[missing], max_points, heavy=True
+            )
+            for column, values in computed.items():
+                dataframe_cache.put(key + ("downsample", column, max_points), values)
+            series.update(computed)
+        return {column: series[column] for column in df.columns}
+
+    async def get_line_plot_data(self, max_points=0):
+        df = self._line_plot(await self.get_df())
+        return await self._downsample(df, max_points)
+
+    async def get_correlation_matrix_data(self, method="pearson", float32=False):
+        """Correlation matrix, cached per dataset version, method and precision"""
+        key = file_fingerprint(self.file_path) + ("correlation", method, float32)
+        matrix = dataframe_cache.get(key)
+        if matrix is None:
+            matrix = await self.execute_parallel(
+                correlation_matrix, await self.get_df(), method, float32, heavy=True
+            )
+            dataframe_cache.put(key, matrix)
+        return matrix
+
+    async def get_box_plot_data(
+        self,
+        feature1,
+        exact=False,
+        group_by=None,
+        max_outliers=BOX_PLOT_MAX_OUTLIERS,
+        seed=0,
+    ):
+        """Quartiles, whiskers and capped outliers, returned as
+        (result, approximate). Large ungrouped columns take their quartiles
+        from a sketch; everything else uses a partition per group.
+        """
+        columns = [feature1] if group_by is None else [feature1, group_by]
+        known = set(dataset_columns(self.file_path))
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        df = await self.get_columns(columns)
+        if not is_numeric_dtype(df[feature1]):
+            raise ValueError(f"Column is not numeric: {feature1}")
+
+        if group_by is None and should_approximate(len(df), exact):
+            values = df[feature1].to_numpy(dtype="float64", na_value=np.nan)
+            sketch = await sketch_column(values)
+            quartiles = sketch.quantiles([0.25, 0.5, 0.75])
+            summary = await compute_pool.run(
+                box_summary, values, max_outliers, seed, quartiles, heavy=True
+            )
+            return {"summary": summary}, True
+        result = await self.execute_parallel(
+            box_summaries, df, feature1, group_by, max_outliers, seed, heavy=True
         )
-
-    @staticmethod
-    def _pair_plot(df):
-        return df.select_dtypes(include=["number"])
-
-    async def get_pair_plot_data(self):
-        return await self.execute_parallel(self._pair_plot, await self.get_df())
+        return result, False
+
+    async def get_pair_plot_data(
+        self,
+        max_rows=PAIR_PLOT_MAX_ROWS,
+        max_columns=PAIR_PLOT_MAX_COLUMNS,
+        label=None,
+        seed=0,
+    ):
+        """A sample shared by every panel, returned as (sample, columns,
+        total_rows, total_columns).
+
+        The sample holds all numeric columns and is cached per dataset
+        version, size, label and seed, so changing max_columns does not
+        resample; the first max_columns numeric columns are plotted.
+        """
+        if label is not None and label not in dataset_columns(self.file_path):
+            raise ValueError(f"Unknown columns: {label}")
+        key = file_fingerprint(self.file_path) + ("pair_sample", max_rows, label, seed)
+        sample = dataframe_cache.get(key)
+        if sample is None:
+            df = await self.get_df()
+            sample = await self.execute_parallel(
+                pair_sample, df, max_rows, seed, label, heavy=True
+            )
+            sample.attrs["total_rows"] = len(df)
+            dataframe_cache.put(key, sample)
+
+        numeric = [
+            c for c in sample.columns if c != label and is_numeric_dtype(sample[c])
+        ]
+        columns = numeric[:max_columns]
+        keep = columns + ([label] if label is not None else [])
+        return sample[keep], columns, sample.attrs["total_rows"], len(numeric)
 
     @staticmethod
     def _area_plot(df, feature1):
         return df[feature1]
 
-    async def get_area_plot_data(self, feature1):
-        return await self.execute_parallel(
-            self._area_plot, await self.get_df(), feature1
-        )
+    async def get_area_plot_data(self, feature1, max_points=0):
+        """The downsampled series plus the full column's count and sum"""
+        df = await self.get_columns([feature1])
+        series = self._area_plot(df, feature1)
+        if not is_numeric_dtype(series):
+            raise ValueError(f"Column is not numeric: {feature1}")
+        downsampled = await self._downsample(df, max_points)
+        return downsampled[feature1], int(series.count()), float(series.sum())
@@ -0,0 +1,160 @@
+import asyncio
+import inspect
+import json
+import os
+from functools import partial, wraps
+
+from .dataframe_cache import file_fingerprint
+
+PROFILE_SUFFIX = ".profile.json"
+
+
+def profile_path(file_path: str) -> str:
+    """Location of the precomputed profile kept next to an uploaded CSV"""
+    return os.path.splitext(file_path)[0] + PROFILE_SUFFIX
+
+
+class ProfileStore:
+    """Precomputed endpoint results persisted as a sidecar per dataset.
+
+    A profile is only valid for the file fingerprint it was built from. At
+    most one build runs per fingerprint. The build publishes each section
+    as soon as it is ready, and a reader waits only for the section it asks
+    for instead of recomputing it.
+    """
+
+    def __init__(self):
+        self._profiles: dict[tuple, dict] = {}
+        self._jobs: dict[tuple, asyncio.Task] = {}
+        # Sections of in-flight builds, and an event set on each new one
+        self._partial: dict[tuple, dict] = {}
+        self._published: dict[tuple, asyncio.Event] = {}
+
+    def _read(self, file_path: str, key: tuple) -> dict | None:
+        if key in self._profiles:
+            return self._profiles[key]
+        try:
+            with open(profile_path(file_path)) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if tuple(stored.get("fingerprint", ())) != key:
+            return None
+        self._profiles[key] = stored["sections"]
+        return self._profiles[key]
+
+    def _write(self, file_path: str, key: tuple, sections: dict):
+        path = profile_path(file_path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fingerprint": list(key), "sections": sections}, f)
+        os.replace(tmp_path, path)
+        self._profiles[key] = sections
+
+    def _publish(self, key: tuple, section: str, value):
+        self._partial.setdefault(key, {})[section] = value
+        published = self._published.pop(key, None)
+        if published is not None:
+            published.set()
+
+    def start(self, file_path: str, builder) -> asyncio.Task | None:
+        """Schedule builder(file_path, publish) unless a profile exists or is
+        being built; the builder calls publish(section, value) as it goes"""
+        key = file_fingerprint(file_path)
+        if key in self._jobs or self._read(file_path, key) is not None:
+            return self._jobs.get(key)
+
+        async def run():
+            try:
+                sections = await builder(file_path, partial(self._publish, key))
+                await asyncio.to_thread(self._write, file_path, key, sections)
+            except Exception:
+                pass  # endpoints fall back to computing on demand
+            finally:
+                self._jobs.pop(key, None)
+                self._partial.pop(key, None)
+                self._published.pop(key, None)
+
+        self._jobs[key] = asyncio.create_task(run())
+        return self._jobs[key]
+
+    async def _wait_for_section(self, key: tuple, section: str, job: asyncio.Task):
+        """A section of an in-flight build once published; None if the build
+        ends without it"""
+        while not job.done():
+            if section in self._partial.get(key, {}):
+                return self._partial[key][section]
+            published = self._published.setdefault(key, asyncio.Event())
+            waiter = asyncio.ensure_future(published.wait())
+            try:
+                # Waiting on the job never cancels it when the caller goes away
+                await asyncio.wait({job, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+        return None
+
+    async def get_section(self, file_path: str, section: str):
+        """A precomputed section, waiting for an in-flight build to produce it"""
+        try:
+            key = file_fingerprint(file_path)
+        except OSError:
+            return None
+        job = self._jobs.get(key)
+        if job is not None:
+            value = await self._wait_for_section(key, section, job)
+            if value is not None:
+                return value
+        profile = self._read(file_path, key)
+        return None if profile is None else profile.get(section)
+
+    def discard(self, file_path: str):
+        abs_path = os.path.abspath(file_path)
+        for key in [key for key in self._jobs if key[0] == abs_path]:
+            self._jobs.pop(key).cancel()
+        for key in [key for key in self._profiles if key[0] == abs_path]:
+            self._profiles.pop(key)
+        if os.path.exists(profile_path(file_path)):
+            os.remove(profile_path(file_path))
+
+
+profile_store = ProfileStore()
+
+
+def serve_from_profile(section: str, key: str | None = None):
+    """Answer a service call from the dataset profile when it has the section.
+
+    Only calls made with default options are served this way; any other
+    argument (e.g. exact=True) is computed on demand. With a key, the section
+    maps each value of that argument (e.g. a column) to its result. Services
+    opt out by setting use_profile to False, which the profile builder itself
+    does.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def bind(args, kwargs) -> dict:
+            bound = signature.bind(None, *args, **kwargs)
+            return {k: v for k, v in bound.arguments.items() if k != "self"}
+
+        def uses_defaults(arguments: dict) -> bool:
+            return all(
+                signature.parameters[name].default == value
+                for name, value in arguments.items()
+                if name != key
+            )
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            arguments = bind(args, kwargs)
+            if self.use_profile and uses_defaults(arguments):
+                cached = await profile_store.get_section(self.file_path, section)
+                if cached is not None and key is not None:
+                    cached = cached.get(str(arguments[key]))
+                if cached is not None:
+                    return cached
+            return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,215 @@
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Frames a worker process keeps attached between tasks
+WORKER_ATTACHED_FRAMES = 4
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    # The owning process unlinks blocks; workers must not track them too
+    return shared_memory.SharedMemory(name=name, track=False)
+
+
+def _string_array(series: pd.Series) -> pa.Array | None:
+    """A string column as one Arrow array, or None for any other data"""
+    if not (isinstance(series.dtype, pd.StringDtype) or series.dtype == object):
+        return None
+    try:
+        array = pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None  # mixed objects
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        return None
+    return array
+
+
+class SharedColumn:
+    """How one column travels: as shared blocks holding its buffers ("array",
+    "category", "arrow") or its pickle ("pickle")"""
+
+    def __init__(self, name, kind: str, dtype=None, length: int = 0, block=None):
+        self.name = name
+        self.kind = kind
+        self.dtype = dtype
+        self.length = length
+        self.block = block
+        self.payload = None
+
+
+class SharedFrameHandle:
+    """Small picklable description of a frame living in shared memory"""
+
+    def __init__(self, token: str, columns: list, index: pd.Index, attrs: dict):
+        self.token = token
+        self.columns = columns
+        self.index = index
+        self.attrs = attrs
+
+
+class SharedFrame:
+    """Owner-side copy of a DataFrame's column buffers in shared memory.
+
+    NumPy-backed columns (numbers, bools, datetimes) and categorical codes
+    are placed in one shared block each. String columns, object or str
+    dtype, go as their Arrow validity, offsets and data buffers, one block
+    each. Other columns, such as mixed objects, are pickled once into a
+    block of their own, so the handle itself stays small. The blocks are
+    unlinked once the frame is discarded and no task still holds it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self._users = 0
+        self._discarded = False
+        self._lock = threading.Lock()
+        columns = [self._share_column(name, df[name]) for name in df.columns]
+        self.handle = SharedFrameHandle(
+            uuid.uuid4().hex, columns, df.index, dict(df.attrs)
+        )
+
+    def _share_array(self, values: np.ndarray) -> str:
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self._blocks.append(block)
+        np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+        return block.name
+
+    def _share_buffer(self, buffer: pa.Buffer | None) -> tuple[str, int] | None:
+        if buffer is None:
+            return None
+        block = shared_memory.SharedMemory(create=True, size=max(buffer.size, 1))
+        self._blocks.append(block)
+        block.buf[: buffer.size] = memoryview(buffer).cast("B")
+        return block.name, buffer.size
+
+    def _share_column(self, name, series: pd.Series) -> SharedColumn:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            column = SharedColumn(
+                name, "category", codes.dtype, len(codes), self._share_array(codes)
+            )
+            column.payload = series.dtype
+            return column
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+            values = series.to_numpy()
+            return SharedColumn(
+                name, "array", values.dtype, len(values), self._share_array(values)
+            )
+        array = _string_array(series)
+        if array is not None:
+            column = SharedColumn(name, "arrow", series.dtype, len(array))
+            column.block = [self._share_buffer(buffer) for buffer in array.buffers()]
+            column.payload = (array.type, array.null_count, array.offset)
+            return column
+        data = pickle.dumps(series.to_numpy(), protocol=pickle.HIGHEST_PROTOCOL)
+        column = SharedColumn(name, "pickle", series.dtype, len(series))
+        column.block = self._share_buffer(pa.py_buffer(data))
+        return column
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    def acquire(self) -> SharedFrameHandle:
+        with self._lock:
+            self._users += 1
+        return self.handle
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            unlink = self._discarded and self._users == 0
+        if unlink:
+            self._unlink()
+
+    def discard(self):
+        """Free the blocks now, or when the last running task releases them"""
+        with self._lock:
+            self._discarded = True
+            unlink = self._users == 0
+        if unlink:
+            self._unlink()
+
+    def _unlink(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+_attached: OrderedDict[str, tuple[pd.DataFrame, list]] = OrderedDict()
+
+
+def _detach(blocks: list):
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes with it
+
+
+def _attach_buffers(column: SharedColumn, blocks: list):
+    if column.kind == "pickle":
+        name, size = column.block
+        block = _open_block(name)
+        blocks.append(block)
+        return pickle.loads(block.buf[:size])
+
+    buffers = []
+    for shared in column.block:
+        if shared is None:
+            buffers.append(None)
+            continue
+        name, size = shared
+        block = _open_block(name)
+        blocks.append(block)
+        buffers.append(pa.py_buffer(block.buf[:size]))
+    arrow_type, null_count, offset = column.payload
+    array = pa.Array.from_buffers(
+        arrow_type, column.length, buffers, null_count, offset
+    )
+    if column.dtype == object:
+        return array.to_numpy(zero_copy_only=False)
+    # Arrow-backed string dtypes wrap the shared buffers without a copy
+    return pd.array(array, dtype=column.dtype)
+
+
+def attach_frame(handle: SharedFrameHandle) -> pd.DataFrame:
+    """Rebuild a shared frame in a worker, viewing the shared blocks in place"""
+    if handle.token in _attached:
+        _attached.move_to_end(handle.token)
+        return _attached[handle.token][0]
+
+    blocks, data = [], {}
+    for column in handle.columns:
+        if column.kind in ("arrow", "pickle"):
+            values = _attach_buffers(column, blocks)
+            # A plain array of strings would otherwise be inferred as str
+            data[column.name] = pd.Series(
+                values, index=handle.index, dtype=column.dtype, copy=False
+            )
+            continue
+        block = _open_block(column.block)
+        blocks.append(block)
+        values = np.ndarray((column.length,), column.dtype, buffer=block.buf)
+        values.flags.writeable = False
+        if column.kind == "category":
+            values = pd.Categorical.from_codes(values, dtype=column.payload)
+        data[column.name] = values
+
+    # copy=False keeps one block per column so nothing is consolidated
+    df = pd.DataFrame(data, index=handle.index, copy=False)
+    df.attrs.update(handle.attrs)
+    _attached[handle.token] = (df, blocks)
+    while len(_attached) > WORKER_ATTACHED_FRAMES:
+        _, (_, evicted) = _attached.popitem(last=False)
+        _detach(evicted)
+    return df
@@ -0,0 +1,227 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .compute_pool import compute_pool
+
+QUANTILE_SKETCH_EPSILON = float(os.getenv("QUANTILE_SKETCH_EPSILON", "0.01"))
+APPROX_QUANTILE_MIN_ROWS = int(os.getenv("APPROX_QUANTILE_MIN_ROWS", "1000000"))
+SKETCH_CHUNK_ROWS = 250_000
+
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch.
+
+    Keeps O(k) values in levels of geometrically growing weight; rank error is
+    roughly epsilon * n with k chosen from the requested epsilon.
+    """
+
+    def __init__(self, epsilon: float = QUANTILE_SKETCH_EPSILON, seed: int = 0):
+        self.epsilon = epsilon
+        self.k = max(8, math.ceil(1.7 / epsilon))
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        # Compact the lowest over-full level until the sketch fits its budget
+        while sum(level.size for level in self.levels) > sum(
+            self._capacity(i) for i in range(len(self.levels))
+        ):
+            level = next(
+                i
+                for i, items in enumerate(self.levels)
+                if items.size > self._capacity(i)
+            )
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind so weights remain exact
+            leftover, items = items[: items.size % 2], items[items.size % 2 :]
+            promoted = items[self._rng.integers(2) :: 2]
+            self.levels[level] = leftover
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.count += values.size
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantiles(self, qs) -> np.ndarray:
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(level.size, 2**i, dtype=np.int64)
+                for i, level in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        idx = np.searchsorted(cumulative, targets, side="left")
+        return items[order][np.clip(idx, 0, items.size - 1)]
+
+
+class HyperLogLog:
+    """Approximate distinct counter in 2**precision one-byte registers"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def update(self, series: pd.Series) -> "HyperLogLog":
+        series = series.dropna()
+        if series.empty:
+            return self
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        value_bits = 64 - self.precision
+        buckets = (hashes >> np.uint64(value_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << value_bits) - 1)
+        # Rank is the position of the leftmost 1 bit in the remaining bits
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        ranks = (value_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """Ertl's improved estimator, which corrects the raw HyperLogLog bias
+        across the whole range instead of switching to linear counting below a
+        threshold (the switch overestimated by about 2% near 2.5 * m)"""
+        m = self.registers.size
+        q = 64 - self.precision
+        counts = np.bincount(self.registers, minlength=q + 2)
+        z = m * _tau(1 - counts[q + 1] / m)
+        for rank in range(q, 0, -1):
+            z = 0.5 * (z + counts[rank])
+        z += m * _sigma(counts[0] / m)
+        return int(round(m * m / (2 * math.log(2) * z)))
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x in (0, 1):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class MisraGries:
+    """Mergeable heavy-hitter summary holding at most `capacity` counters.
+
+    Counts are lower bounds, short by at most `error_bound`; when no counter
+    was ever evicted the summary is exact.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.error_bound = 0
+
+    def update_counts(self, counts: pd.Series) -> "MisraGries":
+        counts = counts.copy()
+        counts.index = counts.index.astype(object)
+        combined = self.counts.add(counts, fill_value=0)
+        if len(combined) > self.capacity:
+            threshold = combined.nlargest(self.capacity + 1).iloc[-1]
+            combined = combined[combined > threshold] - threshold
+            self.error_bound += int(threshold)
+        self.counts = combined.astype("int64")
+        return self
+
+    def update(self, series: pd.Series) -> "MisraGries":
+        counts = series.value_counts(dropna=True)
+        return self.update_counts(counts[counts > 0])
+
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        self.update_counts(other.counts)
+        self.error_bound += other.error_bound
+        return self
+
+    @property
+    def exact(self) -> bool:
+        return self.error_bound == 0
+
+    def top(self, k: int | None = None) -> dict:
+        counts = self.counts.sort_values(ascending=False, kind="stable")
+        if k is not None:
+            counts = counts.head(k)
+        return {key: int(value) for key, value in counts.items()}
+
+
+def sketch_chunks(values: np.ndarray, chunk_rows: int) -> list[np.ndarray]:
+    """Split a column into the chunks that are sketched independently"""
+    return [
+        values[start : start + chunk_rows]
+        for start in range(0, len(values), chunk_rows)
+    ]
+
+
+def _sketch_chunk(chunk: np.ndarray) -> KLLSketch:
+    return KLLSketch().update(chunk)
+
+
+def should_approximate(row_count: int, exact: bool) -> bool:
+    return not exact and row_count >= APPROX_QUANTILE_MIN_ROWS
+
+
+async def sketch_columns(
+    columns: list[np.ndarray], chunk_rows: int = SKETCH_CHUNK_ROWS
+) -> list[KLLSketch]:
+    """Sketch every chunk of several columns in parallel, as one pool task,
+    and merge the chunk sketches of each column"""
+    chunks = [
+        (index, chunk)
+        for index, values in enumerate(columns)
+        for chunk in sketch_chunks(values, chunk_rows)
+    ]
+    sketches = await compute_pool.map(_sketch_chunk, [(chunk,) for _, chunk in chunks])
+    merged = [KLLSketch() for _ in columns]
+    for (index, _), sketch in zip(chunks, sketches):
+        merged[index].merge(sketch)
+    return merged
+
+
+async def sketch_column(values: np.ndarray, chunk_rows: int = SKETCH_CHUNK_ROWS):
+    """Sketch each chunk of a column in parallel and merge the results"""
+    return (await sketch_columns([values], chunk_rows))[0]
@@ -0,0 +1,193 @@
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from .categorical_profiler import CategoricalProfiler
+from .ingest import iter_dataset_chunks
+from .sketches import KLLSketch
+
+STREAMING_STATS_THRESHOLD_MB = float(os.getenv("STREAMING_STATS_THRESHOLD_MB", "512"))
+STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "100000"))
+
+
+class ColumnAccumulator:
+    """Single-pass statistics for one column, mergeable chunk by chunk"""
+
+    def __init__(self, numeric: bool = True):
+        self.dtype = None
+        self.numeric = numeric
+        # Parsed as numbers in earlier chunks and as text in a later one
+        self.mixed = False
+        self.count = 0
+        self.null_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.categories = CategoricalProfiler()
+        self.sketch = KLLSketch()
+
+    def _update_dtype(self, series: pd.Series):
+        if self.dtype is None:
+            self.dtype = series.dtype
+        elif self.numeric and is_numeric_dtype(series.dtype):
+            # An int column with NaNs in a later chunk is parsed as float overall
+            self.dtype = np.result_type(self.dtype, series.dtype)
+        elif self.numeric:
+            self.dtype = series.dtype
+
+    def update(self, series: pd.Series):
+        seen = self.dtype is not None
+        self._update_dtype(series)
+        self.null_count += int(series.isna().sum())
+        values = series.dropna()
+
+        if self.numeric and (
+            not is_numeric_dtype(series.dtype) or is_bool_dtype(series.dtype)
+        ):
+            # Earlier numeric chunks never reached the category counts
+            self.mixed = seen
+            self.numeric = False
+
+        if self.numeric:
+            values = values.to_numpy(dtype=np.float64)
+            self._update_moments(values)
+            self.sketch.update(values)
+        else:
+            self.count += len(values)
+            self.categories.update(values)
+
+    def _update_moments(self, values: np.ndarray):
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+
+        # Chan et al. parallel merge of (count, mean, M2)
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta**2 * n_a * n_b / n
+        self.count = n
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+
+    def describe(self) -> dict:
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        q1, median, q3 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return {
+            "count": float(self.count),
+            "mean": self.mean if self.count else np.nan,
+            "std": std,
+            "min": self.min,
+            "25%": q1,
+            "50%": median,
+            "75%": q3,
+            "max": self.max,
+        }
+
+
+class StreamingStats:
+    """Out-of-core equivalent of the DataSummary statistics"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: dict[str, ColumnAccumulator] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            accumulator = self.columns.setdefault(column, ColumnAccumulator())
+            accumulator.update(chunk[column])
+
+    def mixed_columns(self) -> list[str]:
+        return [name for name, acc in self.columns.items() if acc.mixed]
+
+    def null_counts(self) -> tuple[pd.Series, pd.Series]:
+        missing = pd.Series(
+            {name: acc.null_count for name, acc in self.columns.items()}, dtype="int64"
+        )
+        percentage = (missing / self.rows) * 100 if self.rows else missing * 0.0
+        return missing, percentage
+
+    def description(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {name: acc.describe() for name, acc in self.columns.items() if acc.numeric}
+        )
+
+    def data_types(self) -> pd.Series:
+        return pd.Series(
+            {name: str(acc.dtype) for name, acc in self.columns.items()}, dtype=str
+        )
+
+    def categorical_profiles(self) -> dict:
+        return {
+            name: acc.categories.profile()
+            for name, acc in self.columns.items()
+            if not acc.numeric and not is_bool_dtype(acc.dtype)
+        }
+
+    def info_text(self) -> str:
+        return format_info_text(
+            self.rows,
+            [
+                (name, self.rows - acc.null_count, acc.dtype)
+                for name, acc in self.columns.items()
+            ],
+            "not loaded (computed out-of-core)",
+        )
+
+
+def format_info_text(rows: int, columns: list[tuple], memory_usage: str) -> str:
+    """Text in the layout of DataFrame.info() so existing consumers parse it.
+
+    columns holds one (name, non-null count, dtype) entry per column.
+    """
+    width = max([len("Column")] + [len(str(name)) for name, _, _ in columns])
+    lines = [
+        str(pd.DataFrame),
+        f"RangeIndex: {rows} entries, 0 to {max(rows - 1, 0)}",
+        f"Data columns (total {len(columns)} columns):",
+        f" #   {'Column':<{width}}  Non-Null Count  Dtype  ",
+        f"---  {'------':<{width}}  --------------  -----  ",
+    ]
+    for i, (name, non_null, dtype) in enumerate(columns):
+        non_null = f"{non_null} non-null"
+        lines.append(f" {i:<3} {str(name):<{width}}  {non_null:<14}  {dtype}")
+
+    dtype_counts = Counter(str(dtype) for _, _, dtype in columns)
+    lines.append(
+        "dtypes: "
+        + ", ".join(f"{dtype}({n})" for dtype, n in sorted(dtype_counts.items()))
+    )
+    lines.append(f"memory usage: {memory_usage}")
+    return "\n".join(lines) + "\n"
+
+
+def should_stream(file_path: str) -> bool:
+    return os.path.getsize(file_path) > STREAMING_STATS_THRESHOLD_MB * 1024 * 1024
+
+
+def compute_streaming_stats(
+    file_path: str, chunk_rows: int = STREAMING_CHUNK_ROWS
+) -> StreamingStats:
+    stats = StreamingStats()
+    for chunk in iter_dataset_chunks(file_path, chunk_rows):
+        stats.update(chunk)
+
+    # Chunks infer dtypes independently, but a column with any text is text
+    # as a whole: profile those columns again from a pass that reads them as
+    # strings, instead of keeping the numeric state of their first chunks
+    mixed = stats.mixed_columns()
+    if mixed:
+        for column in mixed:
+            stats.columns[column] = ColumnAccumulator(numeric=False)
+        for chunk in iter_dataset_chunks(file_path, chunk_rows, mixed, dtype=str):
+            for column in mixed:
+                stats.columns[column].update(chunk[column])
+    return stats
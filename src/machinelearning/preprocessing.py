@@ -7,6 +7,8 @@ import pandas as pd
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 
+from ..datascience.ingest import read_dataset
+
 
 def preprocess_data(
     data_path: str, target_var: str, save_path: str = "models/"
@@ -14,7 +16,7 @@ def preprocess_data(
     Path(save_path).mkdir(parents=True, exist_ok=True)
 
     # Load data
-    data = pd.read_csv(data_path)
+    data = read_dataset(data_path)
 
     # Handle missing values in numeric columns
     imputer = SimpleImputer(strategy="mean")
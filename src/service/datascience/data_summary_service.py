@@ -2,7 +2,9 @@ from functools import wraps
 
 from fastapi import HTTPException
 
+from ...datascience.compute_pool import ComputePoolBusy
 from ...datascience.data_summary import DataSummary
+from ...datascience.profile_store import serve_from_profile
 
 
 def handle_exceptions(func):
@@ -12,6 +14,8 @@ def handle_exceptions(func):
             return await func(self, *args, **kwargs)
         except FileNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e))
+        except ComputePoolBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -19,40 +23,47 @@ def handle_exceptions(func):
 
 
 class DataSummaryService:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, use_profile: bool = True):
         self.data_summary = DataSummary(file_path)
+        self.file_path = file_path
+        self.use_profile = use_profile
 
     @handle_exceptions
-    async def get_file_info_service(self):
-        file_name, file_size_mb = await self.data_summary.get_file_info()
+    async def get_file_info_service(self, reference=None):
+        file_name, file_size_mb = await self.data_summary.get_file_info(reference)
         return {"file_name": file_name, "file_size_MB": file_size_mb}
 
     @handle_exceptions
-    async def get_data_description_service(self):
-        result = await self.data_summary.get_data_description()
-        return result.to_dict()
+    @serve_from_profile("data_description")
+    async def get_data_description_service(self, exact=False):
+        result, approximate = await self.data_summary.get_data_description(exact)
+        return {"description": result.to_dict(), "approximate": approximate}
 
     @handle_exceptions
+    @serve_from_profile("data_info")
     async def get_data_info_service(self):
-        data_info = await self.data_summary.get_data_info()
-        return {"data_info": data_info}
+        data_info, memory_usage = await self.data_summary.get_data_info()
+        return {"data_info": data_info, "memory_usage": memory_usage}
 
     @handle_exceptions
+    @serve_from_profile("data_types")
     async def get_data_types_service(self):
         result = await self.data_summary.get_data_types()
         return result.to_dict()
 
     @handle_exceptions
-    async def get_categorical_columns_count_service(self):
-        result = await self.data_summary.get_categorical_columns_count()
-        return result.to_dict()
+    @serve_from_profile("categorical_columns_count")
+    async def get_categorical_columns_count_service(self, exact=False):
+        return await self.data_summary.get_categorical_columns_count(exact)
 
     @handle_exceptions
+    @serve_from_profile("row_col_count")
     async def get_row_col_count_service(self):
         rows, cols = await self.data_summary.get_row_col_count()
         return {"rows": rows, "columns": cols}
 
     @handle_exceptions
+    @serve_from_profile("null_value_count")
     async def get_null_val_count_service(self):
         (
             missing_values,
@@ -64,27 +75,50 @@ class DataSummaryService:
         }
 
     @handle_exceptions
-    async def get_all_stats_service(self):
+    async def get_all_stats_service(self, exact=False, reference=None):
+        # file_info belongs to the upload, the rest to its shared content
+        file_name, file_size_mb = await self.data_summary.get_file_info(reference)
+        return {
+            "file_info": {"name": file_name, "size_mb": file_size_mb},
+            **await self._get_all_stats(exact),
+        }
+
+    @serve_from_profile("all_stats")
+    async def _get_all_stats(self, exact=False):
         (
-            file_info,
             row_col,
             null_vals,
             description,
             info,
             data_types,
             cat_counts,
-        ) = await self.data_summary.get_all_stats()
+            timings,
+        ) = await self.data_summary.get_all_stats(exact)
 
         result = {
-            "file_info": {"name": file_info[0], "size_mb": file_info[1]},
             "rows_columns": {"rows": row_col[0], "columns": row_col[1]},
             "missing_values": {
                 "count": null_vals[0].fillna(0).astype(int).to_dict(),
                 "percentage": null_vals[1].fillna(0).round(4).to_dict(),
             },
-            "data_description": description,
-            "data_info": info,
+            # Keyed by column, then statistic, like data_description
+            "data_description": description[0].to_dict(),
+            "data_description_approximate": description[1],
+            "data_info": info[0],
             "data_types": data_types.astype(str).to_dict(),
-            "categorical_column_counts": cat_counts.fillna("none").to_dict(),
+            "categorical_column_counts": {
+                column: profile["top_values"] for column, profile in cat_counts.items()
+            },
+            "categorical_distinct_counts": {
+                column: profile["distinct_count"]
+                for column, profile in cat_counts.items()
+            },
+            # Columns exact=true could not count exactly, and why
+            "categorical_sketched": {
+                column: profile["reason"]
+                for column, profile in cat_counts.items()
+                if "reason" in profile
+            },
+            "timings_ms": timings,
         }
         return result
@@ -2,7 +2,19 @@ from functools import wraps
 
 from fastapi import HTTPException
 
+from ...datascience.compute_pool import ComputePoolBusy
+from ...datascience.correlation import top_correlated_pairs
+from ...datascience.plots.aggregations import (
+    BOX_PLOT_MAX_OUTLIERS,
+    LINE_PLOT_MAX_POINTS,
+    PAIR_PLOT_MAX_COLUMNS,
+    PAIR_PLOT_MAX_ROWS,
+    SCATTER_GRIDSIZE,
+    SCATTER_SAMPLE_SIZE,
+)
 from ...datascience.plots.plots import Plot
+from ...datascience.profile_store import serve_from_profile
+from ..responses import round_floats
 
 
 def handle_exceptions(func):
@@ -10,8 +22,12 @@ def handle_exceptions(func):
     async def wrapper(self, *args, **kwargs):
         try:
             return await func(self, *args, **kwargs)
+        except HTTPException:
+            raise
         except FileNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e))
+        except ComputePoolBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -19,45 +35,151 @@ def handle_exceptions(func):
 
 
 class PlotService:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, use_profile: bool = True):
         self.plot = Plot(file_path)
+        self.file_path = file_path
+        self.use_profile = use_profile
 
     @handle_exceptions
-    async def get_scatter_plot_data_service(self, feature1, feature2):
-        scatter_plot_data = await self.plot.get_scatter_plot_data(feature1, feature2)
-        return scatter_plot_data.round(2).to_dict(orient="list")
+    async def get_scatter_plot_data_service(
+        self,
+        feature1,
+        feature2,
+        mode="auto",
+        grid="rect",
+        gridsize=SCATTER_GRIDSIZE,
+        sample_size=SCATTER_SAMPLE_SIZE,
+        seed=0,
+    ):
+        try:
+            mode, scatter_plot_data = await self.plot.get_scatter_plot_data(
+                feature1, feature2, mode, grid, gridsize, sample_size, seed
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if mode == "points":
+            # Columns stay under "data" so no feature name can shadow a field
+            scatter_plot_data = {
+                "points": len(scatter_plot_data),
+                "data": round_floats(scatter_plot_data, 2),
+            }
+        return {"mode": mode, **scatter_plot_data}
 
     @handle_exceptions
-    async def get_histogram_plot_data_service(self):
-        histogram_plot_data = await self.plot.get_histogram_plot_data()
-        return histogram_plot_data.round(2).to_dict(orient="list")
+    @serve_from_profile("histogram_plot")
+    async def get_histogram_plot_data_service(
+        self, columns=None, bins="auto", raw_limit=0
+    ):
+        try:
+            histograms, raw = await self.plot.get_histogram_plot_data(
+                columns, bins, raw_limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        result = {"bins": bins, "histograms": histograms}
+        if raw is not None:
+            result["raw"] = round_floats(raw, 2)
+        return result
 
     @handle_exceptions
-    async def get_line_plot_data_service(self):
-        line_plot_data = await self.plot.get_line_plot_data()
-        return line_plot_data.round(2).reset_index(drop=True).to_dict(orient="list")
+    @serve_from_profile("line_plot")
+    async def get_line_plot_data_service(self, max_points=LINE_PLOT_MAX_POINTS):
+        line_plot_data = await self.plot.get_line_plot_data(max_points)
+        return {
+            "max_points": max_points,
+            "series": {
+                column: {
+                    "index": values.index.to_numpy(),
+                    "values": round_floats(values, 2),
+                }
+                for column, values in line_plot_data.items()
+            },
+        }
 
     @handle_exceptions
-    async def get_correlation_matrix_data_service(self):
-        correlation_matrix_data = await self.plot.get_correlation_matrix_data()
+    @serve_from_profile("correlation_matrix")
+    async def get_correlation_matrix_data_service(
+        self, method="pearson", top_k=None, float32=False
+    ):
+        correlation_matrix_data = await self.plot.get_correlation_matrix_data(
+            method, float32
+        )
         if correlation_matrix_data.empty:
             raise HTTPException(
                 status_code=422,
                 detail="No numeric columns available to calculate correlation.",
             )
-        return correlation_matrix_data.round(4).to_dict(orient="list")
+        if top_k:
+            pairs = top_correlated_pairs(correlation_matrix_data, top_k)
+            for pair in pairs:
+                pair["correlation"] = round(pair["correlation"], 4)
+            return {"method": method, "pairs": pairs}
+        return round_floats(correlation_matrix_data, 4)
 
     @handle_exceptions
-    async def get_box_plot_data_service(self, feature1):
-        boxplot_data = await self.plot.get_box_plot_data(feature1)
-        return {feature1: boxplot_data.round(2).tolist()}
+    @serve_from_profile("box_plot", key="feature1")
+    async def get_box_plot_data_service(
+        self,
+        feature1,
+        exact=False,
+        group_by=None,
+        max_outliers=BOX_PLOT_MAX_OUTLIERS,
+        seed=0,
+    ):
+        try:
+            box_plot_data, approximate = await self.plot.get_box_plot_data(
+                feature1, exact, group_by, max_outliers, seed
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "feature": feature1,
+            "group_by": group_by,
+            "approximate": approximate,
+            **box_plot_data,
+        }
 
     @handle_exceptions
-    async def get_pair_plot_data_service(self):
-        pair_plot_data = await self.plot.get_pair_plot_data()
-        return pair_plot_data.round(2).to_dict(orient="list")
+    async def get_pair_plot_data_service(
+        self,
+        max_rows=PAIR_PLOT_MAX_ROWS,
+        max_columns=PAIR_PLOT_MAX_COLUMNS,
+        label=None,
+        seed=0,
+    ):
+        try:
+            (
+                sample,
+                columns,
+                total_rows,
+                total_columns,
+            ) = await self.plot.get_pair_plot_data(max_rows, max_columns, label, seed)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        data = round_floats(sample[columns], 2)
+        if label is not None:
+            data[label] = sample[label].to_numpy()
+        return {
+            "columns": columns,
+            "label": label,
+            "rows": len(sample),
+            "total_rows": total_rows,
+            "total_columns": total_columns,
+            "data": data,
+        }
 
     @handle_exceptions
-    async def get_area_plot_data_service(self, feature1):
-        area_plot_data = await self.plot.get_area_plot_data(feature1)
-        return {feature1: area_plot_data.round(2).tolist()}
+    async def get_area_plot_data_service(self, feature1, max_points=0):
+        try:
+            values, rows, total = await self.plot.get_area_plot_data(
+                feature1, max_points
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "feature": feature1,
+            "index": values.index.to_numpy(),
+            "values": round_floats(values, 2),
+            "rows": rows,
+            "sum": round(total, 2),
+        }
@@ -0,0 +1,68 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from ...datascience.profile_store import profile_store
+from ...datascience.streaming_stats import should_stream
+from ..responses import to_jsonable
+from .data_summary_service import DataSummaryService
+from .plot_service import PlotService
+
+
+class ProfileService:
+    @staticmethod
+    async def build_profile(file_path: str, publish) -> dict:
+        """Compute the default responses of the summary and plot endpoints.
+
+        Sections are built cheapest first and each is published as soon as
+        it is ready, so a waiting endpoint does not wait for the whole build.
+        """
+        sections = {}
+
+        async def add(section: str, call):
+            sections[section] = jsonable_encoder(to_jsonable(await call))
+            publish(section, sections[section])
+
+        # Per-upload fields such as the original filename stay out: the
+        # profile is shared by every session that uploaded the same content
+        summary = DataSummaryService(file_path, use_profile=False)
+
+        # Files streamed for all_stats are too large to load for the rest
+        if not should_stream(file_path):
+            await add("row_col_count", summary.get_row_col_count_service())
+            await add("data_types", summary.get_data_types_service())
+            await add("null_value_count", summary.get_null_val_count_service())
+            await add("data_info", summary.get_data_info_service())
+            await add("data_description", summary.get_data_description_service())
+            await add(
+                "categorical_columns_count",
+                summary.get_categorical_columns_count_service(),
+            )
+        await add("all_stats", summary._get_all_stats())
+
+        if not should_stream(file_path):
+            plots = PlotService(file_path, use_profile=False)
+            await add("histogram_plot", plots.get_histogram_plot_data_service())
+            await add("box_plot", ProfileService._box_plots(plots))
+            await add("line_plot", plots.get_line_plot_data_service())
+            try:
+                await add(
+                    "correlation_matrix", plots.get_correlation_matrix_data_service()
+                )
+            except HTTPException:
+                pass  # no numeric columns; the endpoint reports that on demand
+
+        return sections
+
+    @staticmethod
+    async def _box_plots(plots: PlotService) -> dict:
+        """Default box plot of every numeric column, keyed by column"""
+        df = await plots.plot.get_df()
+        return {
+            str(column): await plots.get_box_plot_data_service(column)
+            for column in df.select_dtypes(include=["number"]).columns
+        }
+
+    @staticmethod
+    def start_profile(file_path: str):
+        """Build the profile in the background unless it exists or is running"""
+        return profile_store.start(file_path, ProfileService.build_profile)
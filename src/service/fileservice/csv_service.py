@@ -1,47 +1,158 @@
+import asyncio
+import hashlib
 import os
 import tempfile
 
-import pandas as pd
 from fastapi import HTTPException, UploadFile
 from fastapi.responses import JSONResponse
 
+from ...datascience.dataframe_cache import (
+    cacheable_frame,
+    dataframe_cache,
+    file_fingerprint,
+)
+from ...datascience.ingest import (
+    add_reference,
+    convert_to_columnar,
+    reference_lock,
+    release_reference,
+    remove_columnar,
+    sample_dtypes,
+)
+from ...datascience.profile_store import profile_store
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+FEATURE_SAMPLE_ROWS = 1000
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "200"))
+UPLOAD_DIR = os.getenv(
+    "UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "uploaded_csv")
+)
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the maximum upload size of {MAX_UPLOAD_MB:g} MB",
+    )
+
+
+def _store_upload(
+    incoming_path: str, file_path: str, original_filename: str
+) -> tuple[bool, str]:
+    """Move an upload to its content-addressed name and reference it.
+
+    Runs under the upload's lock, so cleanup cannot delete a file between the
+    existence check and the new reference. Returns (deduplicated, reference).
+    """
+    with reference_lock(file_path):
+        deduplicated = os.path.exists(file_path)
+        if deduplicated:
+            # Identical content already stored: reuse it and its artifacts
+            os.remove(incoming_path)
+        else:
+            os.replace(incoming_path, file_path)
+        return deduplicated, add_reference(file_path, original_filename)
+
 
 class CsvService:
+    @staticmethod
+    async def _stream_to_disk(file: UploadFile, destination) -> dict:
+        """Copy the upload in fixed-size chunks, hashing and counting as it goes"""
+        max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+        hasher = hashlib.sha256()
+        size_bytes = 0
+        line_count = 0
+        last_chunk = b""
+
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size_bytes += len(chunk)
+            if size_bytes > max_bytes:
+                raise _upload_too_large()
+            hasher.update(chunk)
+            line_count += chunk.count(b"\n")
+            destination.write(chunk)
+            last_chunk = chunk
+
+        # A final line without a trailing newline still holds a row
+        if last_chunk and not last_chunk.endswith(b"\n"):
+            line_count += 1
+
+        return {
+            "sha256": hasher.hexdigest(),
+            "size_bytes": size_bytes,
+            "rows": max(line_count - 1, 0),  # minus the header line
+        }
+
     @staticmethod
     async def upload_csv_file_service(file: UploadFile) -> dict:
+        if file.size is not None and file.size > MAX_UPLOAD_MB * 1024 * 1024:
+            raise _upload_too_large()
+
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        temp_file = None
         try:
-            # Create a temporary file
+            # Stream into a scratch file first; its final name is the content hash
             temp_file = tempfile.NamedTemporaryFile(
-                delete=False,  # Don't delete immediately so we can read it later
-                suffix=f"_{file.filename}",  # Keep original filename for reference
-                prefix="uploaded_csv_",
+                delete=False, dir=UPLOAD_DIR, prefix="incoming_", suffix=".csv"
             )
-
-            # Write uploaded file content to temporary file
-            temp_file.write(await file.read())
+            upload_stats = await CsvService._stream_to_disk(file, temp_file)
             temp_file.close()
 
-            # Get the absolute path of the temporary file
-            absolute_file_path = os.path.abspath(temp_file.name)
+            absolute_file_path = os.path.abspath(
+                os.path.join(UPLOAD_DIR, f"{upload_stats['sha256']}.csv")
+            )
+            deduplicated, reference = await asyncio.to_thread(
+                _store_upload, temp_file.name, absolute_file_path, file.filename
+            )
+
+            if not deduplicated:
+                # Parse once into a columnar copy and warm the shared cache with it
+                try:
+                    df = await asyncio.to_thread(
+                        convert_to_columnar, absolute_file_path
+                    )
+                    df = await asyncio.to_thread(
+                        cacheable_frame, absolute_file_path, df
+                    )
+                    dataframe_cache.put(file_fingerprint(absolute_file_path), df)
+                except Exception:
+                    pass  # unparseable uploads surface their error on first analysis
 
             return {
                 "message": f"File '{file.filename}' uploaded successfully to temporary location",
                 "absolute_file_path": absolute_file_path,
                 "original_filename": file.filename,
+                "reference": reference,
+                "deduplicated": deduplicated,
+                **upload_stats,
             }
         except Exception as e:
+            if temp_file is not None:
+                temp_file.close()
+                if os.path.exists(temp_file.name):
+                    os.remove(temp_file.name)
+            if isinstance(e, HTTPException):
+                raise
             raise HTTPException(
                 status_code=500, detail=f"Error uploading file: {str(e)}"
             )
 
     @staticmethod
-    def cleanup_temp_file(file_path: str) -> bool:
-        """Clean up temporary file"""
+    def cleanup_temp_file(file_path: str, reference: str | None = None) -> bool:
+        """Release one session's reference, deleting the data once unused"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            with reference_lock(file_path) as lock_path:
+                if not release_reference(file_path, reference):
+                    return True
+
+                profile_store.discard(file_path)
+                dataframe_cache.invalidate(file_path)
+                remove_columnar(file_path)
+                os.remove(lock_path)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    return True
+                return False
         except Exception:
             return False
 
@@ -53,18 +164,19 @@ class CsvService:
                     status_code=404, detail=f"CSV file not found: {csv_file}"
                 )
 
-            df = pd.read_csv(csv_file)
+            # Only the header and a small sample are needed, never the full file
+            dtypes = sample_dtypes(csv_file, FEATURE_SAMPLE_ROWS)
+            columns = list(dtypes)
 
-            label_column = df.columns[-1]  # Last column is the label
+            label_column = columns[-1]  # Last column is the label
 
-            feature_columns = df.columns[
-                :-1
-            ].tolist()  # All columns except the last one
+            feature_columns = columns[:-1]  # All columns except the last one
 
             return JSONResponse(
                 content={
                     "feature_columns": feature_columns,
                     "label_column": label_column,
+                    "dtypes": dtypes,
                 }
             )
         except Exception as e:
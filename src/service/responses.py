@@ -0,0 +1,241 @@
+import hashlib
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from ..datascience.dataframe_cache import file_fingerprint
+from ..datascience.ingest import read_reference
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def round_floats(values, decimals: int):
+    """Round the float columns of a DataFrame, Series or array with NumPy.
+
+    Series come back as arrays and DataFrames as frames of one array per
+    column; non-float data is passed through unchanged.
+    """
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(
+            {column: round_floats(values[column], decimals) for column in values},
+            copy=False,
+        )
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    if values.dtype.kind == "f":
+        return np.round(values, decimals)
+    return values
+
+
+def _orjson_default(obj):
+    """What orjson cannot serialize natively, in a form it can.
+
+    DataFrames become dicts of columns and Series arrays, so their index is
+    dropped: results whose row labels matter are converted with to_dict().
+    """
+    if isinstance(obj, pd.DataFrame):
+        return {column: obj[column].to_numpy() for column in obj.columns}
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        # Strided views are copied once; object arrays go element-wise
+        if obj.dtype.kind in "biuf" and not obj.flags.c_contiguous:
+            return np.ascontiguousarray(obj)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    return jsonable_encoder(obj)
+
+
+def dumps(result) -> bytes:
+    """JSON bytes of a result; arrays are written straight from their buffers
+    and NaN becomes null"""
+    return orjson.dumps(result, option=ORJSON_OPTIONS, default=_orjson_default)
+
+
+def to_jsonable(result):
+    """Plain Python values for the JSON encoder.
+
+    DataFrames become dicts of column lists (orient="list"), arrays and
+    Series become lists, dropping their index as dumps() does. Lists are
+    passed through as they are.
+    """
+    if isinstance(result, pd.DataFrame):
+        return result.to_dict(orient="list")
+    if isinstance(result, (pd.Series, pd.Index, np.ndarray)):
+        return result.tolist()
+    if isinstance(result, np.generic):
+        return result.item()
+    if isinstance(result, dict):
+        return {key: to_jsonable(value) for key, value in result.items()}
+    return result
+
+
+def _is_column(value) -> bool:
+    if isinstance(value, (np.ndarray, pd.Series)):
+        return value.ndim == 1
+    # Lists of lists or records are nested values, not columns
+    return isinstance(value, list) and not (
+        value and isinstance(value[0], (list, dict))
+    )
+
+
+def _table_part(result) -> tuple[str, pa.Table | None]:
+    """The columnar part of a result and the key it sits under.
+
+    A DataFrame result, or the first DataFrame value of a dict result, is
+    the table. Otherwise the top-level 1-D arrays of a dict form the table
+    when they all have the same length; their key is reported as "".
+    """
+    if isinstance(result, pd.DataFrame):
+        return "", pa.Table.from_pandas(result, preserve_index=False)
+    for key, value in result.items():
+        if isinstance(value, pd.DataFrame):
+            return key, pa.Table.from_pandas(value, preserve_index=False)
+
+    columns = {key: value for key, value in result.items() if _is_column(value)}
+    if len({len(value) for value in columns.values()}) != 1:
+        return "", None
+    return "", pa.table(
+        {
+            str(key): pa.array(
+                value.to_numpy() if isinstance(value, pd.Series) else value
+            )
+            for key, value in columns.items()
+        }
+    )
+
+
+def to_arrow_table(result) -> pa.Table:
+    """A result as one Arrow table plus JSON schema metadata.
+
+    The columnar part travels as Arrow buffers. Every other field is JSON
+    under the b"fields" metadata key, and b"table" names the result key the
+    table belongs to ("" when its columns are top-level entries).
+    """
+    key, table = _table_part(result)
+    if table is None:
+        table = pa.table({})
+    if isinstance(result, pd.DataFrame):
+        fields = {}
+    elif key:
+        fields = {k: v for k, v in result.items() if k != key}
+    else:
+        fields = {k: v for k, v in result.items() if k not in table.column_names}
+    metadata = {
+        **(table.schema.metadata or {}),
+        b"table": key.encode(),
+        b"fields": dumps(fields),
+    }
+    return table.replace_schema_metadata(metadata)
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSON response that serializes NumPy arrays, pandas objects and plain
+    Python values with orjson, without converting cells to Python objects"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class ArrowResponse(Response):
+    media_type = ARROW_STREAM
+
+    def render(self, content: pa.Table) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, content.schema) as writer:
+            writer.write_table(content)
+        return sink.getvalue().to_pybytes()
+
+
+def accepts_arrow(request: Request) -> bool:
+    for accepted in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in accepted.split(";"))
+        if media_type == ARROW_STREAM:
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        return float(value) > 0
+                    except ValueError:
+                        return False
+            return True
+    return False
+
+
+def entity_tag(request: Request) -> str | None:
+    """Weak ETag of a response computed from a dataset.
+
+    Weak because equal requests may get equivalent rather than identical
+    bytes, e.g. a result served from the profile or streamed on a cold
+    cache instead of computed from the loaded frame.
+
+    It hashes the file fingerprint, the path, the query and what selects the
+    representation (Arrow or JSON, and the Accept-Encoding header). With an
+    upload reference it also hashes what the reference records, so a
+    released reference does not revalidate the name it used to report. None
+    when the request names no readable file.
+    """
+    try:
+        file_path = request.query_params["csv_file"]
+        fingerprint = file_fingerprint(file_path)
+    except (KeyError, OSError):
+        return None
+    reference = request.query_params.get("reference")
+    key = (
+        fingerprint,
+        read_reference(file_path, reference) if reference else None,
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        accepts_arrow(request),
+        request.headers.get("accept-encoding", ""),
+    )
+    return 'W/"' + hashlib.sha256(repr(key).encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: the W/ prefix is ignored
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def conditional_get(request: Request):
+    """Router dependency answering If-None-Match with 304 before the
+    endpoint loads or computes anything; otherwise the ETag is kept on
+    request.state for respond()"""
+    etag = entity_tag(request)
+    if etag is None:
+        return
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        raise HTTPException(
+            status_code=304, headers={"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+        )
+    request.state.etag = etag
+
+
+def server_timing(timings: dict[str, float]) -> str:
+    """A Server-Timing header value from durations in milliseconds"""
+    return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
+
+
+def respond(request: Request, result) -> Response:
+    """Arrow IPC stream when the client asks for it, JSON otherwise"""
+    if accepts_arrow(request):
+        response = ArrowResponse(to_arrow_table(result))
+    else:
+        response = NumpyJSONResponse(result)
+    response.headers["Vary"] = "Accept"
+    etag = getattr(request.state, "etag", None)
+    if etag is not None:
+        response.headers["ETag"] = etag
+        # Caches may keep the result but must revalidate it every time
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
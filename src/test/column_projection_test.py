@@ -0,0 +1,78 @@
+"""Checks that plots read only the columns they ask for.
+
+Run from the repository root:
+    python -m src.test.column_projection_test
+"""
+
+import asyncio
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.datascience.dataframe_cache import DataFrameCache, load_columns
+from src.datascience.ingest import convert_to_columnar
+
+
+def write_csv(directory: str) -> str:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "a": rng.normal(size=100),
+            "b": rng.integers(0, 10, size=100),
+            "c": rng.choice(["x", "y"], size=100),
+        }
+    )
+    path = os.path.join(directory, "data.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_load_columns_reads_only_requested_columns():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_csv(directory)
+        expected = pd.read_csv(path)
+        for _ in range(2):  # from the CSV, then from its Parquet copy
+            df = load_columns(path, ["c", "a"])
+            assert sorted(df.columns) == ["a", "c"]
+            assert np.allclose(df["a"], expected["a"])
+            assert (df["c"].astype(str) == expected["c"]).all()
+            convert_to_columnar(path)
+
+
+def test_get_columns_loads_each_column_once():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_csv(directory)
+        requested = []
+
+        def loader(file_path, columns):
+            requested.append(list(columns))
+            return pd.read_csv(file_path, usecols=columns)
+
+        cache = DataFrameCache(max_bytes=1 << 20)
+        df = asyncio.run(cache.get_columns(path, ["a", "b", "a"], loader=loader))
+        assert list(df.columns) == ["a", "b"]
+        df = asyncio.run(cache.get_columns(path, ["b", "c"], loader=loader))
+        assert list(df.columns) == ["b", "c"]
+        assert requested == [["a", "b"], ["c"]]
+
+
+def test_get_columns_projects_a_cached_frame():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_csv(directory)
+
+        def loader(file_path, columns):
+            raise AssertionError("the cached frame should have been used")
+
+        cache = DataFrameCache(max_bytes=1 << 20)
+        full = asyncio.run(cache.get_or_load(path, loader=pd.read_csv))
+        df = asyncio.run(cache.get_columns(path, ["c"], loader=loader))
+        assert df.equals(full[["c"]])
+
+
+if __name__ == "__main__":
+    test_load_columns_reads_only_requested_columns()
+    test_get_columns_loads_each_column_once()
+    test_get_columns_projects_a_cached_frame()
+    print("column projection reads only the requested columns")
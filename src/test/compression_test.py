@@ -0,0 +1,154 @@
+"""Checks response compression: negotiation, the size thresholds and that
+streamed bodies decode piece by piece.
+
+Run from the repository root:
+    python -m src.test.compression_test
+"""
+
+import asyncio
+import os
+import zlib
+
+import brotli
+import zstandard
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+
+from src.api.compression import CompressionMiddleware, negotiate_encoding
+
+BODY = (b"0123456789abcdef" * 64) + os.urandom(64)  # 1088 bytes
+
+
+def make_app(**options) -> CompressionMiddleware:
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small():
+        return Response(b"tiny", media_type="text/plain")
+
+    @app.get("/body")
+    async def body():
+        return Response(BODY * 10, media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(BODY * 10, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield BODY * 5
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/not_modified")
+    async def not_modified():
+        return Response(status_code=304, headers={"ETag": '"x"'})
+
+    return CompressionMiddleware(app, **options)
+
+
+def call(app, path: str, accept_encoding: str) -> tuple[dict, list[bytes]]:
+    """The response headers and each body message of one GET"""
+    scope = {
+        "type": "http",
+        # 2.4: streaming responses do not poll receive() for a disconnect
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, *bodies = messages
+    headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    headers[":status"] = start["status"]
+    return headers, [message.get("body", b"") for message in bodies]
+
+
+def decompressor(encoding: str):
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress
+    if encoding == "br":
+        return brotli.Decompressor().process
+    return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+
+
+def test_negotiation_follows_q_values_then_server_order():
+    assert negotiate_encoding("gzip, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0.9, *;q=0.1") == "br"
+    assert negotiate_encoding("*") == "zstd"
+    assert negotiate_encoding("zstd;q=0, gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("gzip;q=bad, br") == "br"
+    assert negotiate_encoding("zstd, gzip", ("gzip",)) == "gzip"
+
+
+def test_each_encoding_round_trips():
+    app = make_app()
+    for encoding in ("zstd", "br", "gzip"):
+        headers, bodies = call(app, "/body", encoding)
+        assert headers["content-encoding"] == encoding
+        assert "accept-encoding" in headers["vary"].lower()
+        assert int(headers["content-length"]) == sum(map(len, bodies))
+        assert decompressor(encoding)(b"".join(bodies)) == BODY * 10
+
+
+def test_small_excluded_and_unmodified_responses_pass_through():
+    app = make_app()
+    for path, expected in (("/small", b"tiny"), ("/image", BODY * 10)):
+        headers, bodies = call(app, path, "gzip")
+        assert "content-encoding" not in headers
+        assert b"".join(bodies) == expected
+    headers, _ = call(app, "/not_modified", "gzip")
+    assert headers[":status"] == 304 and "content-encoding" not in headers
+    headers, bodies = call(app, "/body", "identity")
+    assert "content-encoding" not in headers and b"".join(bodies) == BODY * 10
+
+
+def test_large_and_streamed_bodies_decode_as_they_arrive():
+    app = make_app(stream_minimum_size=4096, chunk_size=2048)
+    for path in ("/body", "/stream"):
+        for encoding in ("zstd", "br", "gzip"):
+            headers, bodies = call(app, path, encoding)
+            assert "content-length" not in headers
+            decode = decompressor(encoding)
+            decoded = [decode(body) for body in bodies]
+            assert b"".join(decoded) == (BODY * 10 if path == "/body" else BODY * 15)
+            if path == "/stream":
+                # Every chunk the app streamed is readable before the next
+                assert sum(map(len, decoded[:-1])) >= len(BODY * 10)
+
+
+def test_route_levels_pick_the_longest_prefix():
+    app = make_app(route_levels={"/a": {"gzip": 1}, "/a/b": {"gzip": 9, "br": 11}})
+    assert app.level("/a/x", "gzip") == 1
+    assert app.level("/a/b/c", "gzip") == 9
+    assert app.level("/a/x", "br") == 4  # no level configured: the default
+    assert app.level("/other", "zstd") == 3
+
+
+if __name__ == "__main__":
+    test_negotiation_follows_q_values_then_server_order()
+    test_each_encoding_round_trips()
+    test_small_excluded_and_unmodified_responses_pass_through()
+    test_large_and_streamed_bodies_decode_as_they_arrive()
+    test_route_levels_pick_the_longest_prefix()
+    print("responses compress and decode in every encoding")
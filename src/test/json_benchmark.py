@@ -0,0 +1,79 @@
+"""Serialization time per MB of JSON for typical plot payloads.
+
+"before" is the previous path: DataFrame.round, to_dict(orient="list"),
+FastAPI's jsonable_encoder and the standard json module, as JSONResponse
+rendered it. "after" is round_floats plus the orjson-based
+NumpyJSONResponse. Both produce the same document.
+
+Run from the repository root:
+    python -m src.test.json_benchmark --rows 1000000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from src.service.responses import NumpyJSONResponse, round_floats
+
+ROUNDS = 5
+
+
+def before(df: pd.DataFrame) -> bytes:
+    content = jsonable_encoder(df.round(2).to_dict(orient="list"))
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def after(df: pd.DataFrame) -> bytes:
+    return NumpyJSONResponse(round_floats(df, 2)).body
+
+
+def median_seconds(func, df) -> tuple[float, bytes]:
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        body = func(df)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), body
+
+
+def make_payload(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.normal(scale=100, size=(rows, columns)),
+        columns=[f"feature_{i}" for i in range(columns)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=2)
+    args = parser.parse_args()
+
+    df = make_payload(args.rows, args.columns)
+    results = {
+        name: median_seconds(func, df)
+        for name, func in [("before", before), ("after", after)]
+    }
+    if json.loads(results["before"][1]) != json.loads(results["after"][1]):
+        print("Warning: the two paths produced different documents")
+
+    print(f"Payload: {args.rows:,} rows x {args.columns} float columns")
+    for name, (seconds, body) in results.items():
+        mb = len(body) / 1e6
+        print(
+            f"{name:>6}: {seconds * 1000:8.1f} ms for {mb:6.1f} MB "
+            f"({seconds * 1000 / mb:6.1f} ms/MB)"
+        )
+    print(f"Speedup: {results['before'][0] / results['after'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
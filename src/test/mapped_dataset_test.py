@@ -0,0 +1,70 @@
+"""Checks that the memory-mapped Arrow copy reads back the dataset it was
+written from, with repetitive strings mapped as categorical codes.
+
+Run from the repository root:
+    python -m src.test.mapped_dataset_test
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.datascience.ingest import has_fresh_mapped, read_mapped, write_mapped
+
+
+def make_frame(rows: int = 10_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    floats = rng.normal(size=rows)
+    floats[::7] = np.nan
+    labels = rng.choice(["north", "south", "east"], size=rows).astype(object)
+    labels[::5] = None
+    return pd.DataFrame(
+        {
+            "float": floats,
+            "int": rng.integers(0, 100, size=rows),
+            "label": labels,
+            "comment": [f"row {i}" for i in range(rows)],
+        }
+    )
+
+
+def test_mapped_copy_maps_numbers_and_repetitive_strings():
+    df = make_frame()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.csv")
+        df.to_csv(path, index=False)
+        write_mapped(path, df)
+        assert has_fresh_mapped(path)
+        mapped = read_mapped(path)
+
+        assert isinstance(mapped["label"].dtype, pd.CategoricalDtype)
+        assert not isinstance(mapped["comment"].dtype, pd.CategoricalDtype)
+        # Numbers and codes view the mapped pages instead of owning a copy
+        assert not mapped["float"].to_numpy().flags.owndata
+        assert not mapped["label"].cat.codes.to_numpy().flags.owndata
+
+        pd.testing.assert_series_equal(
+            mapped["label"].astype(object), df["label"], check_dtype=False
+        )
+        pd.testing.assert_series_equal(mapped["float"], df["float"])
+        assert mapped["comment"].tolist() == df["comment"].tolist()
+
+
+def test_concurrent_writes_do_not_share_a_temp_file():
+    df = make_frame(2000)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.csv")
+        df.to_csv(path, index=False)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: write_mapped(path, df), range(8)))
+        assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+        pd.testing.assert_series_equal(read_mapped(path)["float"], df["float"])
+
+
+if __name__ == "__main__":
+    test_mapped_copy_maps_numbers_and_repetitive_strings()
+    test_concurrent_writes_do_not_share_a_temp_file()
+    print("the mapped copy reads back its dataset")
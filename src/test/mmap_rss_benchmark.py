@@ -0,0 +1,114 @@
+"""Memory per worker process with and without memory-mapped datasets.
+
+Starts N processes that each load the same dataset through the
+DataFrameCache loader, as N uvicorn workers would, touch every column and
+report their memory while all of them are alive. PSS splits shared pages
+between the processes mapping them, so its total is the real footprint.
+
+Run from the repository root (Linux only, reads /proc):
+    python -m src.test.mmap_rss_benchmark --workers 4 --rows 2000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+def memory_mb() -> dict:
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f.readlines()[1:])
+    kb = {key: int(value.split()[0]) for key, value in fields.items()}
+    return {
+        "Rss": kb["Rss"] / 1024,
+        "Pss": kb["Pss"] / 1024,
+        "Shared": (kb["Shared_Clean"] + kb["Shared_Dirty"]) / 1024,
+    }
+
+
+def worker(csv_file, mmap, ready, done, results):
+    os.environ["DATASET_MMAP"] = "1" if mmap else "0"
+    from src.datascience.dataframe_cache import load_dataset
+
+    df = load_dataset(csv_file)
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series):
+            series.sum()
+        else:
+            series.value_counts()
+    ready.wait()  # every worker holds its frame while memory is measured
+    results.put(memory_mb())
+    done.wait()
+
+
+def measure(csv_file: str, workers: int, mmap: bool) -> list[dict]:
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Barrier(workers), context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(csv_file, mmap, ready, done, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    usage = [results.get() for _ in processes]
+    done.wait()
+    for process in processes:
+        process.join()
+    return usage
+
+
+def make_dataset(directory: str, rows: int) -> str:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "x": rng.normal(size=rows),
+            "y": rng.random(rows),
+            "count": rng.integers(0, 1000, rows),
+            "label": rng.choice(["alpha", "beta", "gamma", "delta"], rows),
+            "comment": [f"row {i}" for i in range(rows)],
+        }
+    )
+    csv_file = os.path.join(directory, "benchmark.csv")
+    df.to_csv(csv_file, index=False)
+    return csv_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="dataset to load (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = args.csv or make_dataset(directory, args.rows)
+        print(f"Dataset: {csv_file}, {args.workers} workers")
+        for mmap in (False, True):
+            if mmap:
+                # Convert once up front, as the upload does, so workers only map
+                from src.datascience.ingest import read_dataset, write_mapped
+
+                write_mapped(csv_file, read_dataset(csv_file))
+            usage = measure(csv_file, args.workers, mmap)
+            rss = sum(u["Rss"] for u in usage) / len(usage)
+            shared = sum(u["Shared"] for u in usage) / len(usage)
+            pss = sum(u["Pss"] for u in usage)
+            label = "memory-mapped Arrow" if mmap else "in-memory DataFrame"
+            print(
+                f"{label:>20}: RSS per worker {rss:8.1f} MB "
+                f"({shared:.1f} MB shared), total PSS {pss:8.1f} MB"
+            )
+
+        if not args.csv:
+            from src.datascience.ingest import remove_columnar
+
+            remove_columnar(csv_file)
+
+
+if __name__ == "__main__":
+    main()
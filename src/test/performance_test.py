@@ -1,9 +1,11 @@
+import statistics
 import time
 
 import httpx
 
 BASE_URL = "https://140.238.255.45/data_summary"
 CSV_FILE_PARAM = {"csv_file": "/app/src/csvfiles/train.csv"}
+ROUNDS = 5
 
 ENDPOINTS = [
     "/file_info",
@@ -18,39 +20,65 @@ ENDPOINTS = [
 ALL_STATS_ENDPOINT = "/all_stats"
 
 
+def time_individual_requests(client):
+    start_time = time.time()
+    responses = [
+        client.get(f"{BASE_URL}{endpoint}", params=CSV_FILE_PARAM)
+        for endpoint in ENDPOINTS
+    ]
+    elapsed = time.time() - start_time
+
+    for response in responses:
+        if response.status_code != 200:
+            print(
+                f"Request to {response.url} failed with status code {response.status_code}"
+            )
+    return elapsed, all(response.status_code == 200 for response in responses)
+
+
+def time_all_stats_request(client):
+    start_time = time.time()
+    response = client.get(f"{BASE_URL}{ALL_STATS_ENDPOINT}", params=CSV_FILE_PARAM)
+    elapsed = time.time() - start_time
+    return elapsed, response
+
+
 def measure_time():
     with httpx.Client(verify=False, timeout=10) as client:
-        start_time = time.time()
-        responses = []
-        for endpoint in ENDPOINTS:
-            response = client.get(f"{BASE_URL}{endpoint}", params=CSV_FILE_PARAM)
-            responses.append(response)
-        end_time = time.time()
-        individual_time = end_time - start_time
-
-        for response in responses:
-            if response.status_code != 200:
-                print(
-                    f"Request to {response.url} failed with status code {response.status_code}"
-                )
-
-        if all(response.status_code == 200 for response in responses):
+        individual_times, all_stats_times = [], []
+        individual_ok, all_stats_ok = True, True
+        response = None
+
+        for _ in range(ROUNDS):
+            elapsed, ok = time_individual_requests(client)
+            individual_times.append(elapsed)
+            individual_ok = individual_ok and ok
+
+            elapsed, response = time_all_stats_request(client)
+            all_stats_times.append(elapsed)
+            all_stats_ok = all_stats_ok and response.status_code == 200
+
+        if individual_ok:
             print("All individual requests were successful.")
         else:
             print("Some individual requests failed.")
 
-        start_time = time.time()
-        response = client.get(f"{BASE_URL}{ALL_STATS_ENDPOINT}", params=CSV_FILE_PARAM)
-        end_time = time.time()
-        all_stats_time = end_time - start_time
-
-        if response.status_code == 200:
+        if all_stats_ok:
             print("All stats request was successful.")
         else:
             print("All stats request failed.")
 
+        individual_time = statistics.median(individual_times)
+        all_stats_time = statistics.median(all_stats_times)
+        print(f"Median over {ROUNDS} rounds:")
         print(f"Total time for individual requests: {individual_time:.4f} seconds")
         print(f"Time for /all_stats request: {all_stats_time:.4f} seconds")
+        print(f"Speedup: {individual_time / all_stats_time:.2f}x")
+
+        if all_stats_ok:
+            print("Server-side section timings (ms):")
+            for section, ms in response.json().get("timings_ms", {}).items():
+                print(f"  {section}: {ms}")
 
         if all_stats_time < individual_time:
             print("/all_stats is more optimized than separate requests.")
@@ -0,0 +1,341 @@
+"""Checks the server-side plot reductions against the raw data they reduce.
+
+Run from the repository root:
+    python -m src.test.plot_aggregations_test
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from src.datascience.plots import aggregations
+from src.datascience.plots.aggregations import (
+    HISTOGRAM_BIN_RULES,
+    box_summaries,
+    box_summary,
+    downsample,
+    hex_density,
+    histogram,
+    lttb_indices,
+    pair_sample,
+    parse_bins,
+    partition_quantiles,
+    rect_density,
+    sample_positions,
+    scatter_sample,
+)
+from src.service.datascience.plot_service import PlotService
+from src.service.responses import dumps, to_arrow_table
+
+
+def test_histogram_counts_every_finite_value():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=10_000)
+    values[::10] = np.nan
+    values[1] = np.inf
+    result = histogram(pd.Series(values), 20)
+    finite = values[np.isfinite(values)]
+    assert len(result["edges"]) == 21
+    assert sum(result["counts"]) == finite.size
+    assert result["missing"] == values.size - finite.size
+    counts, edges = np.histogram(finite, bins=20)
+    assert result["counts"] == counts.tolist()
+    assert np.allclose(result["edges"], edges)
+
+
+def test_histogram_matches_numpy_estimators_below_the_cap():
+    values = np.random.default_rng(1).normal(size=2000)
+    for rule in HISTOGRAM_BIN_RULES:
+        counts, _ = np.histogram(values, bins=rule)
+        assert len(counts) <= aggregations.HISTOGRAM_MAX_BINS
+        assert histogram(pd.Series(values), rule)["counts"] == counts.tolist()
+
+
+def test_far_outliers_cap_estimator_bins():
+    # Freedman-Diaconis would ask numpy for about 10**11 edges here
+    values = np.random.default_rng(2).normal(size=1_000_000)
+    values[0] = 1e12
+    for rule in ("auto", "fd", "scott"):
+        start = time.perf_counter()
+        result = histogram(pd.Series(values), rule)
+        assert time.perf_counter() - start < 5
+        assert len(result["counts"]) == aggregations.HISTOGRAM_MAX_BINS
+        assert sum(result["counts"]) == values.size
+
+
+def test_histogram_edge_cases():
+    assert histogram(pd.Series([np.nan, np.nan]), "auto") == {
+        "edges": [],
+        "counts": [],
+        "missing": 2,
+    }
+    constant = histogram(pd.Series([3.0] * 50), "fd")
+    assert sum(constant["counts"]) == 50
+    nullable = histogram(pd.Series([1, None, 3], dtype="Int64"), 2)
+    assert nullable["counts"] == [1, 1] and nullable["missing"] == 1
+
+
+def test_parse_bins_accepts_counts_and_rules_only():
+    assert parse_bins("10") == 10
+    assert parse_bins("sturges") == "sturges"
+    for bad in ("0", str(aggregations.HISTOGRAM_MAX_BINS + 1), "-5", "many"):
+        try:
+            parse_bins(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} was accepted")
+
+
+def reference_lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> list[int]:
+    """Textbook LTTB, one bucket at a time, over the same bucket bounds"""
+    edges = np.linspace(1, y.size - 1, max_points - 1).astype(np.int64)
+    selected, a = [0], 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            following = slice(end, edges[bucket + 2])
+            next_x, next_y = x[following].mean(), y[following].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        best, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs(
+                (x[a] - next_x) * (y[i] - y[a]) - (x[a] - x[i]) * (next_y - y[a])
+            )
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        a = best
+    return selected + [y.size - 1]
+
+
+def test_lttb_matches_the_reference_algorithm():
+    rng = np.random.default_rng(3)
+    for n, max_points in ((1000, 50), (5003, 301), (200, 199)):
+        x = np.arange(n, dtype=np.float64)
+        y = np.cumsum(rng.normal(size=n))
+        indices = lttb_indices(x, y, max_points)
+        assert indices.tolist() == reference_lttb(x, y, max_points)
+        assert indices.size == max_points
+        assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_keeps_spikes_and_small_inputs():
+    y = np.zeros(100_000)
+    y[12_345], y[67_890] = 50.0, -50.0
+    x = np.arange(y.size, dtype=np.float64)
+    indices = lttb_indices(x, y, 500)
+    assert {0, 12_345, 67_890, y.size - 1} <= set(indices.tolist())
+    assert lttb_indices(x[:10], y[:10], 500).tolist() == list(range(10))
+    assert lttb_indices(x, y, 2).size == y.size  # too few points to bucket
+
+
+def test_downsample_drops_missing_and_keeps_row_positions():
+    values = pd.Series(np.sin(np.arange(10_000) / 100.0))
+    values[::3] = np.nan
+    reduced = downsample(values, 400)
+    assert len(reduced) == 400
+    assert not reduced.isna().any()
+    assert reduced.index[0] == 1 and reduced.index[-1] == 9998
+    assert np.allclose(reduced.to_numpy(), values[reduced.index].to_numpy())
+    assert len(downsample(values, 0)) == values.notna().sum()
+
+
+def test_rect_density_counts_every_pair():
+    rng = np.random.default_rng(4)
+    x, y = rng.normal(size=20_000), rng.exponential(size=20_000)
+    result = rect_density(x, y, 30)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=30)
+    assert result["counts"].shape == (30, 30)
+    assert (result["counts"] == counts.T).all()
+    assert np.allclose(result["x_edges"], x_edges)
+    assert np.allclose(result["y_edges"], y_edges)
+    constant = rect_density(x, np.ones_like(x), 10)
+    assert constant["counts"].sum() == x.size
+
+
+def test_hex_density_assigns_points_to_the_nearest_center():
+    rng = np.random.default_rng(5)
+    x, y = rng.normal(size=3000), rng.normal(size=3000) * 5
+    result = hex_density(x, y, 12)
+    assert result["counts"].sum() == x.size
+    # Brute force over the occupied centers, in the hexagonal metric
+    sx = result["hex_width"]
+    sy = (y.max() - y.min()) / max(int(12 / np.sqrt(3)), 1)
+    dx = (x[:, None] - result["x"][None, :]) / sx
+    dy = (y[:, None] - result["y"][None, :]) / sy
+    nearest = np.argmin(dx**2 + 3.0 * dy**2, axis=1)
+    expected = np.bincount(nearest, minlength=result["counts"].size)
+    assert (expected == result["counts"]).all()
+
+
+def test_scatter_sample_budgets_the_extremes():
+    rng = np.random.default_rng(6)
+    df = pd.DataFrame({"x": rng.normal(size=50_000), "y": rng.normal(size=50_000)})
+    df.loc[::17, "y"] = np.nan
+    finite = df.dropna()
+    for size in (1, 3, 100):
+        result = scatter_sample(df, "x", "y", size, seed=1)
+        assert result["points"] == len(result["data"]) == size
+    result = scatter_sample(df, "x", "y", 500, seed=1)
+    data = result["data"]
+    assert data["x"].max() == np.round(finite["x"].max(), 2)
+    assert data["y"].min() == np.round(finite["y"].min(), 2)
+    again = scatter_sample(df, "x", "y", 500, seed=1)["data"]
+    pd.testing.assert_frame_equal(data, again)
+    small = scatter_sample(df.head(10), "x", "y", 500, seed=1)
+    assert small["points"] == df.head(10).dropna().shape[0]
+
+
+def test_scatter_columns_cannot_shadow_response_fields():
+    df = pd.DataFrame({"points": np.arange(100.0), "mode": np.arange(100.0) * 2})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.csv")
+        df.to_csv(path, index=False)
+        service = PlotService(path, use_profile=False)
+        for mode in ("points", "sample", "density"):
+            result = asyncio.run(
+                service.get_scatter_plot_data_service(
+                    "points", "mode", mode, sample_size=10
+                )
+            )
+            assert result["mode"] == mode
+            assert result["points"] == (10 if mode == "sample" else 100)
+            if mode == "density":
+                continue
+            body = orjson.loads(dumps(result))
+            assert set(body["data"]) == {"points", "mode"}
+            table = to_arrow_table(result)
+            assert table.schema.metadata[b"table"] == b"data"
+            assert table.column_names == ["points", "mode"]
+            fields = orjson.loads(table.schema.metadata[b"fields"])
+            assert fields == {"mode": mode, "points": result["points"]}
+
+
+def test_partition_quantiles_match_numpy():
+    values = np.random.default_rng(7).normal(size=1001)
+    qs = [0.0, 0.25, 0.5, 0.75, 0.9, 1.0]
+    assert np.allclose(partition_quantiles(values, qs), np.quantile(values, qs))
+    assert np.allclose(partition_quantiles(values[:4], qs), np.quantile(values[:4], qs))
+
+
+def test_box_summary_matches_tukey_definition():
+    rng = np.random.default_rng(8)
+    values = np.concatenate([rng.normal(size=5000), [40.0, -35.0], [np.nan] * 3])
+    summary = box_summary(values.copy(), max_outliers=10_000)
+    finite = values[~np.isnan(values)]
+    q1, median, q3 = np.quantile(finite, [0.25, 0.5, 0.75])
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = finite[(finite >= low) & (finite <= high)]
+    assert summary["count"] == finite.size
+    assert np.isclose(summary["median"], median)
+    assert np.isclose(summary["q1"], q1) and np.isclose(summary["q3"], q3)
+    assert summary["lower_whisker"] == inside.min()
+    assert summary["upper_whisker"] == inside.max()
+    assert summary["outlier_count"] == finite.size - inside.size
+    assert len(summary["outliers"]) == summary["outlier_count"]
+    assert box_summary(np.array([np.nan]))["count"] == 0
+
+
+def test_box_outliers_are_capped_and_keep_the_extremes():
+    rng = np.random.default_rng(9)
+    values = rng.standard_cauchy(size=100_000)
+    for cap in (0, 1, 2, 50):
+        summary = box_summary(values.copy(), max_outliers=cap, seed=3)
+        assert summary["outlier_count"] > cap
+        assert len(summary["outliers"]) == cap
+        if cap >= 2:
+            assert min(summary["outliers"]) == round(values.min(), 2)
+            assert max(summary["outliers"]) == round(values.max(), 2)
+    again = box_summary(values.copy(), max_outliers=50, seed=3)
+    assert again == box_summary(values.copy(), max_outliers=50, seed=3)
+
+
+def test_box_summaries_group_like_groupby():
+    rng = np.random.default_rng(10)
+    df = pd.DataFrame(
+        {
+            "value": rng.normal(size=3000),
+            "group": rng.choice(["a", "b", "c"], size=3000),
+        }
+    )
+    result = box_summaries(df, "value", "group")
+    assert result["group_count"] == 3
+    for name, rows in df.groupby("group")["value"]:
+        summary = result["groups"][name]
+        assert summary["count"] == len(rows)
+        assert np.isclose(summary["median"], rows.median())
+    overall = box_summaries(df, "value")["summary"]
+    assert overall["count"] == len(df)
+
+
+def test_stratified_sample_keeps_class_shares_and_rare_classes():
+    rng = np.random.default_rng(11)
+    labels = pd.Series(rng.choice(["a", "b", "c"], p=[0.7, 0.29, 0.01], size=50_000))
+    labels[labels.index[-3:]] = "rare"
+    labels[::1000] = None
+    positions = sample_positions(len(labels), 2000, seed=2, strata=labels)
+    assert positions.size == 2000 and (np.diff(positions) > 0).all()
+    sampled = labels.iloc[positions].value_counts(dropna=False)
+    expected = labels.value_counts(dropna=False) * 2000 / len(labels)
+    assert sampled["rare"] == 1 and sampled[np.nan] >= 1
+    assert (abs(sampled - expected.clip(lower=1)) <= 1).all()
+    again = sample_positions(len(labels), 2000, seed=2, strata=labels)
+    assert (positions == again).all()
+
+
+def test_many_strata_fall_back_to_uniform_sampling():
+    n, max_rows = 100_000, 2000
+    uniform = sample_positions(n, max_rows, seed=4)
+    assert uniform.size == max_rows and len(np.unique(uniform)) == max_rows
+    # 1500 labels would spend most of the sample on one-row minimums
+    labels = pd.Series(np.arange(n) % 1500)
+    positions = sample_positions(n, max_rows, seed=4, strata=labels)
+    assert (positions == uniform).all()
+    few = pd.Series(np.arange(n) % 150)
+    counts = few.iloc[sample_positions(n, max_rows, seed=4, strata=few)].value_counts()
+    assert counts.min() >= 13 and counts.max() <= 14
+    assert (sample_positions(10, max_rows, strata=labels[:10]) == np.arange(10)).all()
+
+
+def test_pair_sample_keeps_numeric_columns_and_label():
+    rng = np.random.default_rng(12)
+    df = pd.DataFrame(
+        {
+            "x": rng.normal(size=5000),
+            "name": rng.choice(["p", "q"], size=5000),
+            "y": rng.integers(0, 9, size=5000),
+        }
+    )
+    sample = pair_sample(df, 300, seed=1, label="name")
+    assert list(sample.columns) == ["x", "y", "name"] and len(sample) == 300
+    pd.testing.assert_frame_equal(sample, df.loc[sample.index, ["x", "y", "name"]])
+    assert list(pair_sample(df, 300).columns) == ["x", "y"]
+
+
+if __name__ == "__main__":
+    test_histogram_counts_every_finite_value()
+    test_histogram_matches_numpy_estimators_below_the_cap()
+    test_far_outliers_cap_estimator_bins()
+    test_histogram_edge_cases()
+    test_parse_bins_accepts_counts_and_rules_only()
+    test_lttb_matches_the_reference_algorithm()
+    test_lttb_keeps_spikes_and_small_inputs()
+    test_downsample_drops_missing_and_keeps_row_positions()
+    test_rect_density_counts_every_pair()
+    test_hex_density_assigns_points_to_the_nearest_center()
+    test_scatter_sample_budgets_the_extremes()
+    test_scatter_columns_cannot_shadow_response_fields()
+    test_partition_quantiles_match_numpy()
+    test_box_summary_matches_tukey_definition()
+    test_box_outliers_are_capped_and_keep_the_extremes()
+    test_box_summaries_group_like_groupby()
+    test_stratified_sample_keeps_class_shares_and_rare_classes()
+    test_many_strata_fall_back_to_uniform_sampling()
+    test_pair_sample_keeps_numeric_columns_and_label()
+    print("plot reductions agree with the raw data")
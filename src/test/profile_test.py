@@ -0,0 +1,98 @@
+"""Checks that the background profile serves the default responses.
+
+Run from the repository root:
+    python -m src.test.profile_test
+"""
+
+import asyncio
+import io
+import tempfile
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import UploadFile
+
+from src.service.datascience.data_summary_service import DataSummaryService
+from src.service.datascience.plot_service import PlotService
+from src.service.datascience.profile_service import ProfileService
+from src.service.fileservice import csv_service
+from src.service.fileservice.csv_service import CsvService
+from src.service.responses import NumpyJSONResponse
+
+
+def make_csv() -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "a": rng.normal(size=500),
+            "b": rng.exponential(size=500),
+            "city": rng.choice(["berlin", "paris"], size=500),
+        }
+    )
+    return df.to_csv(index=False).encode()
+
+
+def as_json(result):
+    return orjson.loads(NumpyJSONResponse(result).body)
+
+
+async def upload_and_profile(name: str, content: bytes) -> dict:
+    file = UploadFile(io.BytesIO(content), filename=name)
+    result = await CsvService.upload_csv_file_service(file)
+    job = ProfileService.start_profile(result["absolute_file_path"])
+    if job is not None:
+        await job
+    return result
+
+
+def test_profile_holds_plot_defaults_and_no_upload_fields():
+    previous = csv_service.UPLOAD_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        csv_service.UPLOAD_DIR = directory
+        content = make_csv()
+
+        async def run():
+            first = await upload_and_profile("first.csv", content)
+            second = await upload_and_profile("second.csv", content)
+            path = first["absolute_file_path"]
+            sections = {}
+            await ProfileService.build_profile(path, sections.__setitem__)
+
+            assert "file_info" not in sections
+            assert "file_info" not in sections["all_stats"]
+            assert set(sections["box_plot"]) == {"a", "b"}
+            for section in ("histogram_plot", "line_plot", "correlation_matrix"):
+                assert section in sections
+
+            # Served from the profile, and equal to computing on demand
+            served, computed = PlotService(path), PlotService(path, use_profile=False)
+            for call in (
+                lambda service: service.get_box_plot_data_service("b"),
+                lambda service: service.get_histogram_plot_data_service(),
+                lambda service: service.get_line_plot_data_service(),
+            ):
+                assert as_json(await call(served)) == as_json(await call(computed))
+            assert (
+                await served.get_box_plot_data_service("b") == sections["box_plot"]["b"]
+            )
+
+            # The shared profile still reports each upload's own filename
+            summary = DataSummaryService(path)
+            for upload in (first, second):
+                stats = await summary.get_all_stats_service(
+                    reference=upload["reference"]
+                )
+                info = await summary.get_file_info_service(upload["reference"])
+                assert stats["file_info"]["name"] == upload["original_filename"]
+                assert info["file_name"] == upload["original_filename"]
+
+        try:
+            asyncio.run(run())
+        finally:
+            csv_service.UPLOAD_DIR = previous
+
+
+if __name__ == "__main__":
+    test_profile_holds_plot_defaults_and_no_upload_fields()
+    print("the profile serves the default summary and plot responses")
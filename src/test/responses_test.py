@@ -0,0 +1,291 @@
+"""Checks the response shapes and encodings the routes send.
+
+Run from the repository root:
+    python -m src.test.responses_test
+"""
+
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.routes import csv_file, data_science, data_summary
+from src.service.fileservice import csv_service
+from src.service.responses import (
+    ARROW_STREAM,
+    NumpyJSONResponse,
+    dumps,
+    round_floats,
+    to_arrow_table,
+    to_jsonable,
+)
+
+ARROW = {"Accept": ARROW_STREAM}
+
+
+def make_frame(rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "a": rng.normal(size=rows),
+            "b": rng.integers(0, 50, size=rows),
+            "city": rng.choice(["berlin", "paris"], size=rows),
+        }
+    )
+
+
+def with_dataset(test):
+    """Run test(client, path, df) against the app with a CSV on disk and the
+    rate limits off"""
+
+    def run():
+        limiters = [
+            module.limiter for module in (main, csv_file, data_science, data_summary)
+        ]
+        df = make_frame()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.csv")
+            df.to_csv(path, index=False)
+            for limiter in limiters:
+                limiter.enabled = False
+            try:
+                with TestClient(main.app) as client:
+                    test(client, path, df)
+            finally:
+                for limiter in limiters:
+                    limiter.enabled = True
+
+    run.__name__ = test.__name__
+    return run
+
+
+def read_arrow(response) -> dict:
+    """Decode an Arrow response the way the frontend does"""
+    table = pa.ipc.open_stream(io.BytesIO(response.content)).read_all()
+    metadata = table.schema.metadata or {}
+    result = json.loads(metadata.get(b"fields", b"{}"))
+    key = metadata.get(b"table", b"").decode()
+    frame = table.to_pandas()
+    if key:
+        result[key] = frame
+    else:
+        result.update({column: frame[column].tolist() for column in frame})
+    return result
+
+
+def expected_description(df: pd.DataFrame) -> dict:
+    return json.loads(df.describe().to_json())
+
+
+def assert_description(description: dict, df: pd.DataFrame):
+    expected = expected_description(df)
+    # Keyed by column, then statistic
+    assert set(description) == set(expected) == {"a", "b"}
+    for column, stats in expected.items():
+        assert set(description[column]) == set(stats)
+        for stat, value in stats.items():
+            assert np.isclose(description[column][stat], value)
+
+
+@with_dataset
+def test_descriptions_keep_their_statistic_labels(client, path, df):
+    params = {"csv_file": path, "exact": "true"}
+    json_body = client.get("/data_summary/data_description", params=params).json()
+    assert_description(json_body["description"], df)
+    arrow_body = read_arrow(
+        client.get("/data_summary/data_description", params=params, headers=ARROW)
+    )
+    assert_description(arrow_body["description"], df)
+
+    stats = client.get("/data_summary/all_stats", params=params).json()
+    assert_description(stats["data_description"], df)
+    stats = client.get("/data_summary/all_stats", params={"csv_file": path}).json()
+    assert_description(stats["data_description"], df)
+
+
+def test_dumps_writes_numpy_and_pandas_values():
+    floats = np.arange(12.0)
+    floats[4] = np.nan
+    result = {
+        "floats": floats[::3],  # strided view
+        "ints": np.arange(3, dtype=np.int32),
+        "bools": np.array([True, False]),
+        "objects": np.array([None, "x", 1], dtype=object),
+        "series": pd.Series([1.5, np.nan], index=["p", "q"]),
+        "frame": pd.DataFrame({"a": [1, 2], "s": ["x", None]}),
+        "scalars": [np.int64(3), np.float32(0.5), np.bool_(True), float("inf")],
+        "missing": [pd.NA, pd.NaT, None],
+        "times": np.array(["2024-01-02T03:04:05"], dtype="datetime64[ns]"),
+        1: "non-string key",
+    }
+    assert orjson.loads(dumps(result)) == {
+        "floats": [0.0, 3.0, 6.0, 9.0],
+        "ints": [0, 1, 2],
+        "bools": [True, False],
+        "objects": [None, "x", 1],
+        "series": [1.5, None],
+        "frame": {"a": [1, 2], "s": ["x", None]},
+        "scalars": [3, 0.5, True, None],
+        "missing": [None, None, None],
+        "times": ["2024-01-02T03:04:05"],
+        "1": "non-string key",
+    }
+    assert NumpyJSONResponse(result).body == dumps(result)
+
+
+def test_dumps_agrees_with_the_profile_encoding():
+    # Profiles store jsonable_encoder(to_jsonable(result)), so a result must
+    # read the same whether it is served from the profile or computed
+    result = {
+        "description": make_frame().describe().to_dict(),
+        "histogram": {"counts": np.arange(4), "edges": np.linspace(0, 1, 5)},
+        "frame": round_floats(make_frame().head(5), 2),
+        "nested": {"values": pd.Series([1, 2]), "count": np.int64(2)},
+    }
+    stored = jsonable_encoder(to_jsonable(result))
+    assert orjson.loads(dumps(result)) == orjson.loads(dumps(stored))
+
+
+def test_round_floats_rounds_only_float_columns():
+    df = pd.DataFrame({"x": [1.2345, np.nan], "n": [1, 2], "s": ["a", "b"]})
+    rounded = round_floats(df, 2)
+    assert rounded["x"].tolist()[0] == 1.23 and np.isnan(rounded["x"][1])
+    assert rounded["n"].tolist() == [1, 2] and rounded["s"].tolist() == ["a", "b"]
+    assert round_floats(pd.Series([0.125, 2.0]), 1).tolist() == [0.1, 2.0]
+
+
+def test_arrow_table_carries_the_other_fields():
+    frame = pd.DataFrame({"x": [1.5, 2.5], "label": ["p", "q"]})
+    table = to_arrow_table({"columns": ["x"], "rows": 2, "data": frame})
+    assert table.schema.metadata[b"table"] == b"data"
+    assert orjson.loads(table.schema.metadata[b"fields"]) == {
+        "columns": ["x"],
+        "rows": 2,
+    }
+    pd.testing.assert_frame_equal(table.to_pandas(), frame, check_dtype=False)
+
+    top_level = to_arrow_table({"index": np.arange(3), "values": [1.0, 2.0, 3.0]})
+    assert top_level.column_names == ["index", "values"]
+    assert top_level.schema.metadata[b"table"] == b""
+    ragged = to_arrow_table({"a": [1, 2], "b": [1.0], "name": "n"})
+    assert ragged.num_columns == 0
+    assert orjson.loads(ragged.schema.metadata[b"fields"])["b"] == [1.0]
+
+
+@with_dataset
+def test_json_and_arrow_bodies_agree(client, path, df):
+    for route, params in (
+        ("/data_science/pair_plot", {"max_rows": 50, "label": "city"}),
+        ("/data_science/area_plot", {"feature1": "a", "max_points": 40}),
+        ("/data_science/histogram_plot", {"bins": "10"}),
+    ):
+        params = {"csv_file": path, **params}
+        body = client.get(route, params=params).json()
+        arrow = read_arrow(client.get(route, params=params, headers=ARROW))
+        for key, value in arrow.items():
+            if isinstance(value, pd.DataFrame):
+                value = {column: value[column].tolist() for column in value}
+            assert body[key] == value, (route, key)
+
+
+@with_dataset
+def test_conditional_gets_revalidate_with_weak_etags(client, path, df):
+    route, params = "/data_science/histogram_plot", {"csv_file": path}
+    first = client.get(route, params=params)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"') and "no-cache" in first.headers["Cache-Control"]
+    for if_none_match in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        cached = client.get(
+            route, params=params, headers={"If-None-Match": if_none_match}
+        )
+        assert cached.status_code == 304 and cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    # Anything that changes the body changes the tag
+    others = [
+        client.get(route, params={**params, "bins": "10"}),
+        client.get(route, params=params, headers=ARROW),
+        client.get(route, params=params, headers={"Accept-Encoding": "identity"}),
+    ]
+    tags = {etag} | {response.headers["ETag"] for response in others}
+    assert len(tags) == 4
+    df.head(100).to_csv(path, index=False)
+    changed = client.get(route, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+@with_dataset
+def test_all_stats_keeps_timings_out_of_the_tagged_body(client, path, df):
+    params = {"csv_file": path, "exact": "true"}
+    first = client.get("/data_summary/all_stats", params=params)
+    second = client.get("/data_summary/all_stats", params=params)
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert "timings_ms" not in first.json()
+    assert first.content == second.content
+    assert "total;dur=" in first.headers["Server-Timing"]
+
+
+@with_dataset
+def test_file_info_is_tagged_per_upload_reference(client, path, df):
+    previous = csv_service.UPLOAD_DIR
+    content = df.to_csv(index=False).encode()
+    with tempfile.TemporaryDirectory() as directory:
+        csv_service.UPLOAD_DIR = directory
+        try:
+            uploads = [
+                client.post(
+                    "/csv_file/upload_csv", files={"file": (name, content, "text/csv")}
+                ).json()
+                for name in ("first.csv", "second.csv")
+            ]
+            stored = uploads[0]["absolute_file_path"]
+            assert uploads[1]["absolute_file_path"] == stored
+
+            responses = [
+                client.get(
+                    "/data_summary/file_info",
+                    params={"csv_file": stored, "reference": upload["reference"]},
+                )
+                for upload in uploads
+            ]
+            assert [r.json()["file_name"] for r in responses] == [
+                "first.csv",
+                "second.csv",
+            ]
+            assert responses[0].headers["ETag"] != responses[1].headers["ETag"]
+
+            # A released reference no longer revalidates the name it reported
+            client.delete(
+                "/csv_file/cleanup_temp_file",
+                params={"file_path": stored, "reference": uploads[0]["reference"]},
+            )
+            again = client.get(
+                "/data_summary/file_info",
+                params={"csv_file": stored, "reference": uploads[0]["reference"]},
+                headers={"If-None-Match": responses[0].headers["ETag"]},
+            )
+            assert again.status_code == 200
+            assert again.json()["file_name"] != "first.csv"
+        finally:
+            csv_service.UPLOAD_DIR = previous
+
+
+if __name__ == "__main__":
+    test_descriptions_keep_their_statistic_labels()
+    test_dumps_writes_numpy_and_pandas_values()
+    test_dumps_agrees_with_the_profile_encoding()
+    test_round_floats_rounds_only_float_columns()
+    test_arrow_table_carries_the_other_fields()
+    test_json_and_arrow_bodies_agree()
+    test_conditional_gets_revalidate_with_weak_etags()
+    test_all_stats_keeps_timings_out_of_the_tagged_body()
+    test_file_info_is_tagged_per_upload_reference()
+    print("responses keep their shapes in every encoding")
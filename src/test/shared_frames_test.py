@@ -0,0 +1,143 @@
+"""Checks that frames survive the trip through shared memory and that their
+blocks are freed and budgeted like the cache entries they belong to.
+
+Run from the repository root:
+    python -m src.test.shared_frames_test
+"""
+
+import asyncio
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.datascience.compute_pool import ComputePool
+from src.datascience.dataframe_cache import DataFrameCache
+from src.datascience.shared_frames import SharedFrame, attach_frame
+
+
+def make_frame(rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    floats = rng.normal(size=rows)
+    floats[::7] = np.nan
+    strings = rng.choice(["a", "bb", "ccc"], size=rows).astype(object)
+    strings[::5] = None
+    mixed = np.array([1, "two", 3.0, None] * (rows // 4), dtype=object)
+    return pd.DataFrame(
+        {
+            "int": rng.integers(0, 100, size=rows),
+            "float": floats,
+            "bool": rng.random(rows) < 0.5,
+            "time": pd.date_range("2024-01-01", periods=rows, freq="h"),
+            "category": pd.Categorical(rng.choice(["x", "y"], size=rows)),
+            "object": strings,
+            "string": pd.array(strings, dtype="string"),
+            "mixed": mixed,
+        },
+        index=pd.RangeIndex(rows) * 2,
+    )
+
+
+def block_exists(name: str) -> bool:
+    try:
+        shared_memory.SharedMemory(name=name, track=False).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def test_round_trip_keeps_values_and_dtypes():
+    df = make_frame()
+    frame = SharedFrame(df)
+    try:
+        pd.testing.assert_frame_equal(attach_frame(frame.acquire()), df)
+        frame.release()
+    finally:
+        frame.discard()
+
+
+def test_blocks_outlive_discard_until_released():
+    frame = SharedFrame(make_frame())
+    names = [block.name for block in frame._blocks]
+    frame.acquire()
+    frame.discard()
+    assert all(block_exists(name) for name in names)
+    frame.release()
+    assert not any(block_exists(name) for name in names)
+
+
+def test_cache_charges_and_frees_shared_copies():
+    df = make_frame(20_000)
+    other = make_frame(20_000)
+    cache = DataFrameCache(max_bytes=10**9)
+    cache.put(("df",), df)
+    cache.put(("other",), other)
+    before = cache.stats()["size_bytes"]
+
+    # Concurrent callers get one copy, charged once
+    frames = []
+    threads = [
+        threading.Thread(target=lambda: frames.append(cache.acquire_shared(df)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(frame) for frame in frames}) == 1
+    shared = frames[0]
+    assert cache.stats()["size_bytes"] == before + shared.nbytes
+    assert cache.acquire_shared(pd.DataFrame({"a": [1]})) is None
+
+    # The shared copy counts toward the budget: fitting it evicts the LRU
+    cache.max_bytes = before + shared.nbytes - 1
+    cache._shrink()
+    assert cache.get(("other",)) is None and cache.get(("df",)) is df
+
+    names = [block.name for block in shared._blocks]
+    cache.clear()
+    assert all(block_exists(name) for name in names)  # still acquired
+    for frame in frames:
+        frame.release()
+    assert not any(block_exists(name) for name in names)
+    assert cache.stats()["size_bytes"] == 0
+
+
+def column_sums(df: pd.DataFrame) -> dict:
+    return df.select_dtypes(include=["number"]).sum().to_dict()
+
+
+def test_process_pool_reuses_the_cached_copy():
+    from src.datascience import compute_pool as pool_module
+
+    df = make_frame(100_000)
+    small = make_frame(100)
+    cache = DataFrameCache(max_bytes=10**9)
+    cache.put(("df",), df)
+    previous = pool_module.dataframe_cache
+    pool_module.dataframe_cache = cache
+    pool = ComputePool(backend="process", workers=1)
+    try:
+
+        async def run():
+            for _ in range(2):
+                assert await pool.run(column_sums, df, heavy=True) == column_sums(df)
+            small_sums = await pool.run(column_sums, small, heavy=True)
+            assert small_sums == column_sums(small)
+
+        asyncio.run(run())
+        # Both requests used one copy; the small uncached frame got none
+        assert cache.stats()["shared_frames"] == 1
+    finally:
+        pool.shutdown()
+        pool_module.dataframe_cache = previous
+        cache.clear()
+
+
+if __name__ == "__main__":
+    test_round_trip_keeps_values_and_dtypes()
+    test_blocks_outlive_discard_until_released()
+    test_cache_charges_and_frees_shared_copies()
+    test_process_pool_reuses_the_cached_copy()
+    print("shared frames round-trip and are freed with their cache entries")
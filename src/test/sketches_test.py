@@ -0,0 +1,132 @@
+"""Checks the quantile and distinct-count sketches against exact answers.
+
+Run from the repository root:
+    python -m src.test.sketches_test
+"""
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.datascience import categorical_profiler
+from src.datascience.categorical_profiler import profile_categorical_column
+from src.datascience.sketches import (
+    HyperLogLog,
+    KLLSketch,
+    MisraGries,
+    sketch_columns,
+)
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(sketch: KLLSketch, values: np.ndarray) -> float:
+    """Largest distance, as a fraction of n, between a requested rank and
+    the rank of the value the sketch returned for it"""
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(QUANTILES)
+    low = np.searchsorted(ordered, estimates, side="left") / values.size
+    high = np.searchsorted(ordered, estimates, side="right") / values.size
+    return float(np.max(np.maximum(low - QUANTILES, QUANTILES - high).clip(0)))
+
+
+def test_kll_rank_error_within_epsilon():
+    rng = np.random.default_rng(0)
+    for values in (
+        rng.normal(size=200_000),
+        rng.exponential(size=200_000),
+        rng.integers(0, 20, size=200_000).astype(float),  # heavy ties
+    ):
+        sketch = KLLSketch().update(values)
+        assert sketch.count == values.size
+        assert rank_error(sketch, values) < sketch.epsilon
+
+
+def test_kll_merge_matches_one_sketch():
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(size=300_000)
+    merged = KLLSketch()
+    for chunk in np.array_split(values, 7):
+        merged.merge(KLLSketch().update(chunk))
+    assert merged.count == values.size
+    assert rank_error(merged, values) < merged.epsilon
+
+
+def test_kll_ignores_nan_and_handles_empty_input():
+    sketch = KLLSketch().update([np.nan, 1.0, np.nan, 3.0, 2.0])
+    assert sketch.count == 3
+    assert list(sketch.quantiles([0.0, 0.5, 1.0])) == [1.0, 2.0, 3.0]
+    assert np.isnan(KLLSketch().quantiles([0.5])).all()
+
+
+def test_sketch_columns_sketches_each_column():
+    rng = np.random.default_rng(2)
+    columns = [rng.normal(size=50_000), rng.random(120_000)]
+    sketches = asyncio.run(sketch_columns(columns, chunk_rows=30_000))
+    for sketch, values in zip(sketches, columns):
+        assert sketch.count == values.size
+        assert rank_error(sketch, values) < sketch.epsilon
+
+
+def test_hll_is_unbiased_around_the_linear_counting_range():
+    # The raw estimate is biased near 2.5 * m distinct values (10240 here)
+    for distinct in (100, 5000, 10_000, 12_000, 100_000):
+        errors = []
+        for seed in range(10):
+            values = pd.Series(np.arange(distinct) + seed * 10**7).astype(str)
+            estimate = HyperLogLog().update(values).estimate()
+            errors.append(estimate / distinct - 1)
+        assert abs(np.mean(errors)) < 0.01, (distinct, np.mean(errors))
+        assert np.max(np.abs(errors)) < 0.05, (distinct, errors)
+
+
+def test_hll_merge_and_small_counts():
+    assert HyperLogLog().estimate() == 0
+    values = pd.Series(np.arange(30_000))
+    merged = HyperLogLog().update(values[:20_000])
+    merged.merge(HyperLogLog().update(values[10_000:]))
+    single = HyperLogLog().update(values)
+    assert merged.estimate() == single.estimate()
+    assert HyperLogLog().update(pd.Series(["a", "b", "a", None])).estimate() == 2
+
+
+def test_misra_gries_bounds_counts():
+    rng = np.random.default_rng(3)
+    values = pd.Series(rng.zipf(1.5, size=100_000) % 5000)
+    exact = values.value_counts()
+    summary = MisraGries(capacity=100)
+    for start in range(0, len(values), 10_000):
+        summary.update(values.iloc[start : start + 10_000])
+    assert not summary.exact
+    for value, count in summary.top().items():
+        assert exact[value] - summary.error_bound <= count <= exact[value]
+    # Every value occurring more often than the bound is kept
+    assert set(exact[exact > summary.error_bound].index) <= set(summary.top())
+
+
+def test_exact_profile_above_limit_says_why_it_is_sketched():
+    unique = pd.Series([f"id{i}" for i in range(3000)])
+    previous = categorical_profiler.CATEGORICAL_EXACT_LIMIT
+    categorical_profiler.CATEGORICAL_EXACT_LIMIT = 2000
+    try:
+        sketched = profile_categorical_column(unique, exact=True, chunk_rows=500)
+        exact = profile_categorical_column(unique[:1500], exact=True, chunk_rows=500)
+    finally:
+        categorical_profiler.CATEGORICAL_EXACT_LIMIT = previous
+    assert sketched["approximate"] and "reason" in sketched
+    assert not exact["approximate"] and "reason" not in exact
+    assert exact["distinct_count"] == 1500
+    assert "reason" not in profile_categorical_column(unique, chunk_rows=500)
+
+
+if __name__ == "__main__":
+    test_kll_rank_error_within_epsilon()
+    test_kll_merge_matches_one_sketch()
+    test_kll_ignores_nan_and_handles_empty_input()
+    test_sketch_columns_sketches_each_column()
+    test_hll_is_unbiased_around_the_linear_counting_range()
+    test_hll_merge_and_small_counts()
+    test_misra_gries_bounds_counts()
+    test_exact_profile_above_limit_says_why_it_is_sketched()
+    print("sketches stay within their error bounds")
@@ -0,0 +1,89 @@
+"""Checks the out-of-core statistics against pandas on the whole file.
+
+Run from the repository root:
+    python -m src.test.streaming_stats_test
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.datascience.ingest import convert_to_columnar, has_fresh_columnar
+from src.datascience.streaming_stats import compute_streaming_stats
+
+ROWS = 5000
+CHUNK_ROWS = 700
+QUANTILE_TOLERANCE = 0.02  # values are uniform on [0, 1)
+
+
+def make_frame(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    uniform = rng.random(ROWS)
+    uniform[rng.random(ROWS) < 0.1] = np.nan
+    # Numeric in the first chunks, text from row 3000 on
+    code = rng.integers(0, 50, size=ROWS).astype(object)
+    code[3000:] = [f"c{value}" for value in code[3000:]]
+    return pd.DataFrame(
+        {
+            "uniform": uniform,
+            "count": rng.integers(0, 1000, size=ROWS),
+            "city": rng.choice(["berlin", "paris", "rome"], size=ROWS),
+            "code": code,
+        }
+    )
+
+
+def write_csv(directory: str) -> str:
+    path = os.path.join(directory, "data.csv")
+    make_frame().to_csv(path, index=False)
+    return path
+
+
+def check_numeric_columns(path: str):
+    expected = pd.read_csv(path)
+    stats = compute_streaming_stats(path, CHUNK_ROWS)
+    description = stats.description()
+
+    assert stats.rows == ROWS
+    assert sorted(description.columns) == ["count", "uniform"]
+    assert stats.null_counts()[0].to_dict() == expected.isna().sum().to_dict()
+    for column in description.columns:
+        exact = expected[column].describe()
+        for statistic in ("count", "mean", "std", "min", "max"):
+            assert np.isclose(description[column][statistic], exact[statistic])
+    exact = expected["uniform"].describe()
+    for statistic in ("25%", "50%", "75%"):
+        difference = abs(description["uniform"][statistic] - exact[statistic])
+        assert difference < QUANTILE_TOLERANCE, (statistic, difference)
+
+
+def test_matches_pandas_on_csv_and_parquet():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_csv(directory)
+        check_numeric_columns(path)
+        convert_to_columnar(path)
+        assert has_fresh_columnar(path)
+        check_numeric_columns(path)
+
+
+def test_column_turning_text_in_a_later_chunk_is_profiled_whole():
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_csv(directory)
+        expected = pd.read_csv(path, dtype={"code": str})["code"]
+        stats = compute_streaming_stats(path, CHUNK_ROWS)
+
+        assert "code" not in stats.description().columns
+        profile = stats.categorical_profiles()["code"]
+        assert profile["distinct_count"] == expected.nunique()
+        top_values = expected.value_counts().to_dict()
+        assert profile["top_values"] == top_values
+        assert stats.columns["code"].count == ROWS
+        assert stats.data_types()["code"] == str(expected.dtype)
+
+
+if __name__ == "__main__":
+    test_matches_pandas_on_csv_and_parquet()
+    test_column_turning_text_in_a_later_chunk_is_profiled_whole()
+    print("streaming statistics match pandas")
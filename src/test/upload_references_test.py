@@ -0,0 +1,101 @@
+"""Checks content-addressed uploads, their references and cleanup.
+
+Run from the repository root:
+    python -m src.test.upload_references_test
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+
+from fastapi import UploadFile
+
+from src.datascience.data_summary import DataSummary
+from src.datascience.ingest import columnar_path, references_dir
+from src.service.fileservice import csv_service
+from src.service.fileservice.csv_service import CsvService
+
+CONTENT = b"a,b,label\n1,2.5,x\n3,4.5,y\n5,6.5,x\n"
+
+
+def upload(name: str, content: bytes = CONTENT) -> dict:
+    file = UploadFile(io.BytesIO(content), filename=name, size=len(content))
+    return asyncio.run(CsvService.upload_csv_file_service(file))
+
+
+def file_name(result: dict) -> str:
+    summary = DataSummary(result["absolute_file_path"])
+    name, _ = asyncio.run(summary.get_file_info(result["reference"]))
+    return name
+
+
+def in_upload_dir(test):
+    def run():
+        previous = csv_service.UPLOAD_DIR
+        with tempfile.TemporaryDirectory() as directory:
+            csv_service.UPLOAD_DIR = directory
+            try:
+                test()
+            finally:
+                csv_service.UPLOAD_DIR = previous
+
+    run.__name__ = test.__name__
+    return run
+
+
+@in_upload_dir
+def test_identical_uploads_share_storage_but_keep_their_names():
+    first = upload("first.csv")
+    second = upload("second.csv")
+    assert first["absolute_file_path"] == second["absolute_file_path"]
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert first["reference"] != second["reference"]
+    assert file_name(first) == "first.csv"
+    assert file_name(second) == "second.csv"
+    assert len(os.listdir(csv_service.UPLOAD_DIR)) == 4  # csv, parquet, refs, lock
+
+
+@in_upload_dir
+def test_data_is_deleted_with_the_last_reference():
+    first = upload("first.csv")
+    second = upload("second.csv")
+    path = first["absolute_file_path"]
+
+    assert CsvService.cleanup_temp_file(path, first["reference"])
+    assert os.path.exists(path) and os.path.exists(columnar_path(path))
+    assert file_name(second) == "second.csv"
+
+    assert CsvService.cleanup_temp_file(path, second["reference"])
+    assert not os.path.exists(path)
+    assert not os.path.exists(references_dir(path))
+    assert os.listdir(csv_service.UPLOAD_DIR) == []
+
+
+@in_upload_dir
+def test_cleanup_racing_a_reupload_keeps_the_data():
+    for _ in range(20):
+        first = upload("first.csv")
+        path = first["absolute_file_path"]
+
+        async def race():
+            file = UploadFile(io.BytesIO(CONTENT), filename="second.csv")
+            return await asyncio.gather(
+                asyncio.to_thread(
+                    CsvService.cleanup_temp_file, path, first["reference"]
+                ),
+                CsvService.upload_csv_file_service(file),
+            )
+
+        _, second = asyncio.run(race())
+        assert os.path.exists(path)
+        assert os.listdir(references_dir(path)) == [second["reference"] + ".ref"]
+        assert CsvService.cleanup_temp_file(path, second["reference"])
+        assert not os.path.exists(path)
+
+
+if __name__ == "__main__":
+    test_identical_uploads_share_storage_but_keep_their_names()
+    test_data_is_deleted_with_the_last_reference()
+    test_cleanup_racing_a_reupload_keeps_the_data()
+    print("uploads are deduplicated and deleted with their last reference")
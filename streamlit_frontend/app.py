@@ -1,7 +1,12 @@
+import json
+from collections import OrderedDict
+
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
+import plotly.graph_objects as go
 
 import config
 
@@ -16,8 +21,65 @@ st.set_page_config(
 class MLPlatformAPI:
     """API client for the ML Platform"""
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        arrow: bool = config.API_ARROW_RESPONSES,
+        response_cache: OrderedDict | None = None,
+    ):
         self.base_url = base_url
+        # (path, params, columnar) -> (ETag, decoded result), least recent first
+        self.response_cache = (
+            OrderedDict() if response_cache is None else response_cache
+        )
+        self.columnar_headers = (
+            {"Accept": f"{config.ARROW_STREAM}, application/json;q=0.9"}
+            if arrow
+            else {}
+        )
+
+    @staticmethod
+    def read_response(response):
+        """The JSON body, or an Arrow IPC stream decoded into the same shape:
+        the table goes back under its key as a DataFrame, or as top-level
+        arrays, and the remaining fields come from the schema metadata"""
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith(config.ARROW_STREAM):
+            return response.json()
+        table = pa.ipc.open_stream(response.content).read_all()
+        metadata = table.schema.metadata or {}
+        result = json.loads(metadata.get(b"fields", b"{}"))
+        frame = table.to_pandas()
+        key = metadata.get(b"table", b"").decode()
+        if key:
+            result[key] = frame
+        else:
+            result.update({column: frame[column].to_numpy() for column in frame})
+        return result
+
+    def get_cached(self, path: str, params: dict, columnar: bool = False):
+        """GET a summary or plot endpoint, revalidating the last result of the
+        same request with its ETag so an unchanged dataset costs a 304"""
+        headers = dict(self.columnar_headers) if columnar else {}
+        key = (path, tuple(sorted((k, str(v)) for k, v in params.items())), columnar)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        response = requests.get(
+            f"{self.base_url}{path}", params=params, headers=headers
+        )
+        if response.status_code == 304 and cached is not None:
+            self.response_cache.move_to_end(key)
+            return cached[1]
+        response.raise_for_status()
+        result = self.read_response(response)
+        etag = response.headers.get("ETag")
+        if etag:
+            self.response_cache[key] = (etag, result)
+            self.response_cache.move_to_end(key)
+            while len(self.response_cache) > config.RESPONSE_CACHE_SIZE:
+                self.response_cache.popitem(last=False)
+        return result
 
     def upload_csv(self, file):
         """Upload CSV file to the API"""
@@ -45,10 +107,12 @@ class MLPlatformAPI:
             st.error(f"Error extracting features: {str(e)}")
             return None
 
-    def cleanup_temp_file(self, file_path: str):
+    def cleanup_temp_file(self, file_path: str, reference: str | None = None):
         """Clean up temporary file"""
         try:
             params = {"file_path": file_path}
+            if reference:
+                params["reference"] = reference
             response = requests.delete(
                 f"{self.base_url}/csv_file/cleanup_temp_file", params=params
             )
@@ -61,11 +125,7 @@ class MLPlatformAPI:
         """Get data info"""
         try:
             params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_summary/data_info", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.get_cached("/data_summary/data_info", params)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting data info: {str(e)}")
             return None
@@ -74,50 +134,45 @@ class MLPlatformAPI:
         """Get data description"""
         try:
             params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_summary/data_description", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.get_cached("/data_summary/data_description", params)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting data description: {str(e)}")
             return None
 
-    def get_file_info(self, file_path: str):
+    def get_file_info(self, file_path: str, reference: str | None = None):
         """Get file info"""
         try:
             params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_summary/file_info", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            if reference:
+                params["reference"] = reference
+            return self.get_cached("/data_summary/file_info", params)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting file info: {str(e)}")
             return None
 
-    def get_scatter_plot(self, file_path: str, feature1: str, feature2: str):
+    def get_scatter_plot(
+        self, file_path: str, feature1: str, feature2: str, mode: str = "auto"
+    ):
         """Get scatter plot data"""
         try:
-            params = {"csv_file": file_path, "feature1": feature1, "feature2": feature2}
-            response = requests.get(
-                f"{self.base_url}/data_science/scatter_plot", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            params = {
+                "csv_file": file_path,
+                "feature1": feature1,
+                "feature2": feature2,
+                "mode": mode,
+            }
+            return self.get_cached("/data_science/scatter_plot", params, columnar=True)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting scatter plot: {str(e)}")
             return None
 
-    def get_histogram_plot(self, file_path: str):
+    def get_histogram_plot(self, file_path: str, bins: str = "auto"):
         """Get histogram plot data"""
         try:
-            params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_science/histogram_plot", params=params
+            params = {"csv_file": file_path, "bins": bins}
+            return self.get_cached(
+                "/data_science/histogram_plot", params, columnar=True
             )
-            response.raise_for_status()
-            return response.json()
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting histogram plot: {str(e)}")
             return None
@@ -126,50 +181,50 @@ class MLPlatformAPI:
         """Get line plot data"""
         try:
             params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_science/line_plot", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.get_cached("/data_science/line_plot", params)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting line plot: {str(e)}")
             return None
 
-    def get_correlation_matrix(self, file_path: str):
+    def get_correlation_matrix(self, file_path: str, method: str = "pearson"):
         """Get correlation matrix data"""
         try:
-            params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_science/correlation_matrix", params=params
+            params = {"csv_file": file_path, "method": method}
+            return self.get_cached(
+                "/data_science/correlation_matrix", params, columnar=True
             )
-            response.raise_for_status()
-            return response.json()
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting correlation matrix: {str(e)}")
             return None
 
-    def get_box_plot(self, file_path: str, feature1: str):
+    def get_box_plot(self, file_path: str, feature1: str, group_by: str | None = None):
         """Get box plot data"""
         try:
             params = {"csv_file": file_path, "feature1": feature1}
-            response = requests.get(
-                f"{self.base_url}/data_science/box_plot", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            if group_by:
+                params["group_by"] = group_by
+            return self.get_cached("/data_science/box_plot", params)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting box plot: {str(e)}")
             return None
 
-    def get_pair_plot(self, file_path: str):
+    def get_pair_plot(
+        self,
+        file_path: str,
+        max_rows: int = 2000,
+        max_columns: int = 6,
+        label: str | None = None,
+    ):
         """Get pair plot data"""
         try:
-            params = {"csv_file": file_path}
-            response = requests.get(
-                f"{self.base_url}/data_science/pair_plot", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            params = {
+                "csv_file": file_path,
+                "max_rows": max_rows,
+                "max_columns": max_columns,
+            }
+            if label:
+                params["label"] = label
+            return self.get_cached("/data_science/pair_plot", params, columnar=True)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting pair plot: {str(e)}")
             return None
@@ -178,11 +233,7 @@ class MLPlatformAPI:
         """Get area plot data"""
         try:
             params = {"csv_file": file_path, "feature1": feature1}
-            response = requests.get(
-                f"{self.base_url}/data_science/area_plot", params=params
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.get_cached("/data_science/area_plot", params, columnar=True)
         except requests.exceptions.RequestException as e:
             st.error(f"Error getting area plot: {str(e)}")
             return None
@@ -218,6 +269,8 @@ def initialize_session_state():
     """Initialize session state variables"""
     if "uploaded_file_path" not in st.session_state:
         st.session_state.uploaded_file_path = None
+    if "upload_reference" not in st.session_state:
+        st.session_state.upload_reference = None
     if "features" not in st.session_state:
         st.session_state.features = None
     if "label_column" not in st.session_state:
@@ -230,6 +283,8 @@ def initialize_session_state():
         st.session_state.training_completed = False
     if "training_results" not in st.session_state:
         st.session_state.training_results = None
+    if "response_cache" not in st.session_state:
+        st.session_state.response_cache = OrderedDict()
 
 
 def main():
@@ -248,7 +303,9 @@ def main():
 
     initialize_session_state()
 
-    api_client = MLPlatformAPI(config.API_BASE_URL)
+    api_client = MLPlatformAPI(
+        config.API_BASE_URL, response_cache=st.session_state.response_cache
+    )
 
     st.title("🤖 Machine Learning & Data Science Platform")
     st.markdown("---")
@@ -268,6 +325,7 @@ def main():
                     st.session_state.uploaded_file_path = upload_result[
                         "absolute_file_path"
                     ]
+                    st.session_state.upload_reference = upload_result.get("reference")
                     st.session_state.original_filename = upload_result.get(
                         "original_filename", uploaded_file.name
                     )
@@ -381,7 +439,9 @@ def display_data_overview(api_client):
 
     st.subheader("📄 File Information")
     with st.spinner("Loading file info..."):
-        file_info = api_client.get_file_info(st.session_state.uploaded_file_path)
+        file_info = api_client.get_file_info(
+            st.session_state.uploaded_file_path, st.session_state.upload_reference
+        )
         if file_info:
             col1, col2 = st.columns(2)
             with col1:
@@ -446,6 +506,13 @@ def display_data_overview(api_client):
                 else:
                     st.text(info_text)
 
+            memory_usage = data_info.get("memory_usage")
+            if memory_usage and memory_usage.get("optimized"):
+                st.caption(
+                    f"Backend memory: {memory_usage['before_bytes'] / 1024:.2f} KB → "
+                    f"{memory_usage['after_bytes'] / 1024:.2f} KB after dtype optimization"
+                )
+
     st.subheader("📊 Statistical Description")
     with st.spinner("Loading data description..."):
         data_description = api_client.get_data_description(
@@ -453,7 +520,9 @@ def display_data_overview(api_client):
         )
         if data_description:
             try:
-                desc_df = pd.DataFrame(data_description)
+                desc_df = pd.DataFrame(data_description.get("description", {}))
+                if data_description.get("approximate"):
+                    st.caption("Quartiles are approximate (computed from sketches)")
 
                 if not desc_df.empty:
                     st.dataframe(desc_df.round(3), use_container_width=True)
@@ -560,47 +629,110 @@ def display_scatter_plot(api_client):
             "Select Y-axis feature:", st.session_state.features, key="scatter_y"
         )
 
+    mode = st.radio(
+        "Mode:",
+        ["auto", "points", "density", "sample"],
+        horizontal=True,
+        key="scatter_mode",
+    )
+
     if st.button("Generate Scatter Plot", key="scatter_btn"):
         with st.spinner("Generating scatter plot..."):
             scatter_data = api_client.get_scatter_plot(
-                st.session_state.uploaded_file_path, feature1, feature2
+                st.session_state.uploaded_file_path, feature1, feature2, mode
             )
             if scatter_data:
                 try:
-                    fig = px.scatter(
-                        x=scatter_data[feature1],
-                        y=scatter_data[feature2],
-                        labels={feature1: feature1, feature2: feature2},
-                        title=f"Scatter Plot: {feature1} vs {feature2}",
-                    )
+                    title = f"Scatter Plot: {feature1} vs {feature2}"
+                    if scatter_data.get("mode") == "density":
+                        fig = display_scatter_density(
+                            scatter_data, feature1, feature2, title
+                        )
+                    else:
+                        fig = px.scatter(
+                            x=scatter_data["data"][feature1],
+                            y=scatter_data["data"][feature2],
+                            labels={"x": feature1, "y": feature2},
+                            title=title,
+                        )
                     fig.update_layout(width=800, height=500)
                     st.plotly_chart(fig, use_container_width=True)
+                    if scatter_data.get("mode") != "points":
+                        st.caption(
+                            f"{scatter_data['mode'].capitalize()} view of "
+                            f"{scatter_data['points']:,} points"
+                        )
                 except Exception as e:
                     st.error(f"Error creating scatter plot: {str(e)}")
                     st.write("Raw data:", scatter_data)
 
 
+def display_scatter_density(scatter_data, feature1, feature2, title):
+    """Heatmap (rect grid) or hexagon markers (hex grid) of binned counts"""
+    if scatter_data.get("grid") == "hex":
+        fig = go.Figure(
+            go.Scatter(
+                x=scatter_data.get("x", []),
+                y=scatter_data.get("y", []),
+                mode="markers",
+                marker=dict(
+                    symbol="hexagon",
+                    color=scatter_data.get("counts", []),
+                    colorscale="Viridis",
+                    showscale=True,
+                ),
+            )
+        )
+    else:
+        x_edges = scatter_data.get("x_edges", [])
+        y_edges = scatter_data.get("y_edges", [])
+        fig = go.Figure(
+            go.Heatmap(
+                x=[(a + b) / 2 for a, b in zip(x_edges, x_edges[1:])],
+                y=[(a + b) / 2 for a, b in zip(y_edges, y_edges[1:])],
+                z=scatter_data.get("counts", []),
+                colorscale="Viridis",
+            )
+        )
+    fig.update_layout(title=title, xaxis_title=feature1, yaxis_title=feature2)
+    return fig
+
+
 def display_histogram_plot(api_client):
     """Display histogram plot"""
     st.subheader("📈 Histogram")
 
+    bins = st.selectbox(
+        "Bins:", ["auto", "sturges", "fd", "10", "20", "50", "100"], key="hist_bins"
+    )
+
     if st.button("Generate Histogram", key="hist_btn"):
         with st.spinner("Generating histogram..."):
             hist_data = api_client.get_histogram_plot(
-                st.session_state.uploaded_file_path
+                st.session_state.uploaded_file_path, bins
             )
             if hist_data:
                 try:
-                    df = pd.DataFrame(hist_data)
-
-                    numerical_cols = df.select_dtypes(include=["number"]).columns
-
-                    if len(numerical_cols) > 0:
-                        for col in numerical_cols:
-                            fig = px.histogram(
-                                df, x=col, title=f"Histogram of {col}", nbins=20
+                    histograms = hist_data.get("histograms", {})
+
+                    if histograms:
+                        for col, hist in histograms.items():
+                            edges = hist["edges"]
+                            fig = go.Figure(
+                                go.Bar(
+                                    x=[(a + b) / 2 for a, b in zip(edges, edges[1:])],
+                                    y=hist["counts"],
+                                    width=[b - a for a, b in zip(edges, edges[1:])],
+                                )
+                            )
+                            fig.update_layout(
+                                title=f"Histogram of {col}",
+                                xaxis_title=col,
+                                yaxis_title="count",
+                                bargap=0,
+                                width=800,
+                                height=400,
                             )
-                            fig.update_layout(width=800, height=400)
                             st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.warning("No numerical columns found for histogram.")
@@ -619,18 +751,22 @@ def display_line_plot(api_client):
             line_data = api_client.get_line_plot(st.session_state.uploaded_file_path)
             if line_data:
                 try:
-                    df = pd.DataFrame(line_data)
-
-                    numerical_cols = df.select_dtypes(include=["number"]).columns
-
-                    if len(numerical_cols) > 0:
-                        fig = px.line(
-                            df.reset_index(),
-                            x="index",
-                            y=numerical_cols.tolist(),
-                            title="Line Plot of Numerical Features",
+                    series = line_data.get("series", {})
+
+                    if series:
+                        fig = go.Figure(
+                            [
+                                go.Scatter(
+                                    x=data["index"],
+                                    y=data["values"],
+                                    mode="lines",
+                                    name=col,
+                                )
+                                for col, data in series.items()
+                            ]
                         )
                         fig.update_layout(
+                            title="Line Plot of Numerical Features",
                             width=800,
                             height=500,
                             xaxis_title="Data Point Index",
@@ -649,14 +785,19 @@ def display_correlation_matrix(api_client):
     """Display correlation matrix"""
     st.subheader("🔥 Correlation Matrix")
 
+    method = st.radio(
+        "Method:", ["pearson", "spearman"], horizontal=True, key="corr_method"
+    )
+
     if st.button("Generate Correlation Matrix", key="corr_btn"):
         with st.spinner("Generating correlation matrix..."):
             corr_data = api_client.get_correlation_matrix(
-                st.session_state.uploaded_file_path
+                st.session_state.uploaded_file_path, method
             )
             if corr_data:
                 try:
                     df = pd.DataFrame(corr_data)
+                    df.index = df.columns
 
                     if not df.empty:
                         fig = px.imshow(
@@ -690,34 +831,26 @@ def display_box_plot(api_client):
     feature = st.selectbox(
         "Select feature for box plot:", st.session_state.features, key="box_feature"
     )
+    group_by = st.selectbox(
+        "Group by (optional):",
+        [None] + [f for f in st.session_state.features if f != feature],
+        format_func=lambda f: "—" if f is None else f,
+        key="box_group_by",
+    )
 
     if st.button("Generate Box Plot", key="box_btn"):
         with st.spinner("Generating box plot..."):
             box_data = api_client.get_box_plot(
-                st.session_state.uploaded_file_path, feature
+                st.session_state.uploaded_file_path, feature, group_by
             )
             if box_data:
                 try:
-                    feature_data = box_data.get(feature, [])
-
-                    if feature_data:
-                        fig = px.box(y=feature_data, title=f"Box Plot: {feature}")
-                        fig.update_layout(width=600, height=500, yaxis_title=feature)
-                        st.plotly_chart(fig, use_container_width=True)
-
-                        series = pd.Series(feature_data)
-                        col1, col2, col3, col4 = st.columns(4)
-                        with col1:
-                            st.metric("Mean", f"{series.mean():.2f}")
-                        with col2:
-                            st.metric("Median", f"{series.median():.2f}")
-                        with col3:
-                            st.metric("Std Dev", f"{series.std():.2f}")
-                        with col4:
-                            st.metric(
-                                "IQR",
-                                f"{series.quantile(0.75) - series.quantile(0.25):.2f}",
-                            )
+                    if "groups" in box_data:
+                        display_box_summaries(feature, group_by, box_data)
+                    elif box_data["summary"]["count"]:
+                        display_box_summary(
+                            feature, box_data["summary"], box_data["approximate"]
+                        )
                     else:
                         st.warning(f"No data available for feature: {feature}")
 
@@ -726,34 +859,126 @@ def display_box_plot(api_client):
                     st.write("Raw data:", box_data)
 
 
+def box_traces(name: str, summary: dict) -> list:
+    """A box drawn from precomputed statistics plus its outlier points"""
+    traces = [
+        go.Box(
+            name=name,
+            x=[name],
+            q1=[summary["q1"]],
+            median=[summary["median"]],
+            q3=[summary["q3"]],
+            lowerfence=[summary["lower_whisker"]],
+            upperfence=[summary["upper_whisker"]],
+            showlegend=False,
+        )
+    ]
+    if summary["outliers"]:
+        traces.append(
+            go.Scatter(
+                x=[name] * len(summary["outliers"]),
+                y=summary["outliers"],
+                mode="markers",
+                marker={"size": 4, "opacity": 0.6},
+                name=f"{name} outliers",
+                showlegend=False,
+            )
+        )
+    return traces
+
+
+def display_box_summary(feature: str, summary: dict, approximate: bool = False):
+    """Draw a box plot from precomputed quartiles, whiskers and outliers"""
+    fig = go.Figure(box_traces(feature, summary))
+    suffix = " (approximate quartiles)" if approximate else ""
+    fig.update_layout(
+        title=f"Box Plot: {feature}{suffix}",
+        width=600,
+        height=500,
+        yaxis_title=feature,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Median", f"{summary['median']:.2f}")
+    with col2:
+        st.metric("IQR", f"{summary['q3'] - summary['q1']:.2f}")
+    with col3:
+        st.metric("Range", f"{summary['min']:.2f} – {summary['max']:.2f}")
+    with col4:
+        st.metric("Outliers", f"{summary['outlier_count']:,}")
+    if summary["outlier_count"] > len(summary["outliers"]):
+        st.caption(
+            f"Showing a sample of {len(summary['outliers']):,} of "
+            f"{summary['outlier_count']:,} outliers."
+        )
+
+
+def display_box_summaries(feature: str, group_by: str, box_data: dict):
+    """One box per value of the grouping column"""
+    traces = []
+    for name, summary in box_data["groups"].items():
+        if summary["count"]:
+            traces.extend(box_traces(name, summary))
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=f"Box Plot: {feature} by {group_by}",
+        height=500,
+        xaxis_title=group_by,
+        yaxis_title=feature,
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    if box_data["group_count"] > len(box_data["groups"]):
+        st.caption(
+            f"Showing the {len(box_data['groups'])} most frequent of "
+            f"{box_data['group_count']} groups."
+        )
+
+
 def display_pair_plot(api_client):
     """Display pair plot"""
     st.subheader("🔍 Pair Plot")
 
-    st.info("This plot shows pairwise relationships between all numerical features.")
+    st.info(
+        "This plot shows pairwise relationships between numerical features "
+        "on a sample of rows, stratified by the label column."
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        max_rows = st.select_slider(
+            "Sampled rows:", [500, 1000, 2000, 5000, 10000], value=2000
+        )
+    with col2:
+        max_columns = st.slider("Max features:", 2, 12, 6)
 
     if st.button("Generate Pair Plot", key="pair_btn"):
-        with st.spinner("Generating pair plot... (this may take a while)"):
-            pair_data = api_client.get_pair_plot(st.session_state.uploaded_file_path)
+        with st.spinner("Generating pair plot..."):
+            label = st.session_state.label_column
+            pair_data = api_client.get_pair_plot(
+                st.session_state.uploaded_file_path, max_rows, max_columns, label
+            )
             if pair_data:
                 try:
-                    df = pd.DataFrame(pair_data)
-
-                    numerical_cols = df.select_dtypes(
-                        include=["number"]
-                    ).columns.tolist()
+                    df = pd.DataFrame(pair_data["data"])
+                    numerical_cols = pair_data["columns"]
 
                     if len(numerical_cols) >= 2:
                         fig = px.scatter_matrix(
                             df,
                             dimensions=numerical_cols,
+                            color=pair_data["label"],
                             title="Pair Plot - Scatter Matrix of Numerical Features",
                         )
+                        fig.update_traces(diagonal_visible=False, marker={"size": 3})
                         fig.update_layout(width=800, height=800)
                         st.plotly_chart(fig, use_container_width=True)
 
                         st.info(
-                            f"Showing pairwise relationships for {len(numerical_cols)} numerical features: {', '.join(numerical_cols)}"
+                            f"Showing {len(numerical_cols)} of "
+                            f"{pair_data['total_columns']} numerical features on "
+                            f"{pair_data['rows']:,} of {pair_data['total_rows']:,} rows: "
+                            f"{', '.join(numerical_cols)}"
                         )
                     else:
                         st.warning("Need at least 2 numerical columns for pair plot.")
@@ -783,11 +1008,11 @@ def display_area_plot(api_client):
             )
             if area_data:
                 try:
-                    feature_data = area_data.get(feature, [])
+                    feature_data = area_data.get("values", [])
 
-                    if feature_data:
+                    if len(feature_data):
                         df = pd.DataFrame(
-                            {"index": range(len(feature_data)), feature: feature_data}
+                            {"index": area_data["index"], feature: feature_data}
                         )
 
                         fig = px.area(
@@ -801,13 +1026,12 @@ def display_area_plot(api_client):
                         )
                         st.plotly_chart(fig, use_container_width=True)
 
-                        cumsum = pd.Series(feature_data).cumsum()
                         st.subheader("Cumulative Statistics")
                         col1, col2 = st.columns(2)
                         with col1:
-                            st.metric("Total Sum", f"{cumsum.iloc[-1]:.2f}")
+                            st.metric("Total Sum", f"{area_data['sum']:.2f}")
                         with col2:
-                            st.metric("Data Points", len(feature_data))
+                            st.metric("Data Points", area_data["rows"])
 
                     else:
                         st.warning(f"No data available for feature: {feature}")
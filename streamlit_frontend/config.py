@@ -6,6 +6,11 @@ import os
 
 # API Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+# Ask plot endpoints for Arrow IPC streams instead of JSON
+API_ARROW_RESPONSES = os.getenv("API_ARROW_RESPONSES", "1") == "1"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+# Results kept per session for revalidation with If-None-Match
+RESPONSE_CACHE_SIZE = 32
 
 # Streamlit Configuration
 PAGE_TITLE = "ML Data Science Platform"